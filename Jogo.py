@@ -1,493 +1,563 @@
-import math
-import random
+import argparse
+import atexit
+import threading
+import pygame
 import pgzrun
 from pygame import Rect
-from pgzero.actor import Actor
-
-# --- Game Constants ---
-WIDTH = 800
-HEIGHT = 600
-GRAVITY = 0.5
-PLAYER_JUMP_VELOCITY = -12
-PLAYER_WALK_SPEED = 3
-PLAYER_RUN_SPEED = 6
-ENEMY_WALK_SPEED = 1.5
-ENEMY_RUN_SPEED = 4
-MAX_FALL_SPEED = 10
-ENEMY_SIGHT_RANGE = 200
-ENEMY_ATTACK_COOLDOWN = 1.5
-ENEMY_EDGE_DETECTION_OFFSET = 5
-PROJECTILE_SPEED = 8
-ATTACK_COOLDOWN = 0.5
+from simulation import (
+    World, Inputs, WIDTH, HEIGHT, FIXED_DT, WORLD_PLAYING, WORLD_GAME_OVER, WORLD_VICTORY
+)
+import simulation
+from assets import AssetPreloader, build_manifest
+from audio import AudioDispatcher
+from events import EventBus
+from level import load_level
+from net import SnapshotClient, SnapshotServer
+from pipeline import SimulationThread
+from hud import CachedLayer, new_layer, text_surface
+from profiler import Profiler
+from replay import Recorder, ReplayPlayer, load_replay
+from savestate import Checkpoints, SaveSlots
+from sprites import SpriteCache
+
+# --- Command Line ---
+def parse_options():
+    parser = argparse.ArgumentParser(description="Lutador Vs Samurai Plataforma")
+    parser.add_argument('--record', metavar='ARQUIVO', help="grava as entradas de cada partida neste arquivo")
+    parser.add_argument('--replay', metavar='ARQUIVO', help="reproduz uma partida gravada")
+    parser.add_argument('--level', metavar='ARQUIVO', help="joga esta fase em vez da fase padrão")
+    parser.add_argument('--speed', type=float, default=1.0, help="velocidade do replay (1.0 = tempo real)")
+    parser.add_argument('--dirty-rects', action='store_true', help="redesenha só as áreas que mudaram durante o jogo")
+    parser.add_argument('--profile', action='store_true', help="mede o tempo de cada seção do frame (F3 mostra/esconde)")
+    parser.add_argument('--profile-out', metavar='ARQUIVO', help="exporta as medições ao sair (.csv ou .json)")
+    parser.add_argument('--lazy-audio', action='store_true', help="abre o menu sem esperar os sons carregarem")
+    parser.add_argument('--threaded', action='store_true',
+                        help="roda a simulação numa thread própria e desenha interpolando entre os dois últimos ticks")
+    parser.add_argument('--fps', type=int, default=240,
+                        help="limite de quadros por segundo do desenho com --threaded e --spectate (0 = sem limite)")
+    parser.add_argument('--serve', type=int, metavar='PORTA', help="transmite as partidas para espectadores nesta porta")
+    parser.add_argument('--spectate', metavar='HOST:PORTA', help="assiste às partidas transmitidas por outro jogo")
+    parser.add_argument('--slot', type=int, default=1, help="slot de save usado pelo F5 (salvar) e F9 (carregar)")
+    parser.add_argument('--load', action='store_true', help="começa a partida a partir do save do --slot")
+    return parser.parse_known_args()[0]
+
+options = parse_options()
 
 # --- Game States ---
 GAME_STATE_MENU = 0
 GAME_STATE_PLAYING = 1
 GAME_STATE_GAME_OVER = 2
 GAME_STATE_VICTORY = 3
-current_game_state = GAME_STATE_MENU
+GAME_STATE_LOADING = 4
+GAME_STATE_WAITING = 5
+current_game_state = GAME_STATE_LOADING
+
+# --- Menu Buttons ---
+START_BUTTON = Rect(WIDTH / 2 - 100, HEIGHT / 2 - 30, 200, 60)
+MUSIC_BUTTON = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 50, 200, 60)
+EXIT_BUTTON = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 130, 200, 60)
+PROFILER_PANEL_RECT = Rect(WIDTH - 390, 60, 380, 16 * 13 + 10)
+LOADING_BAR_RECT = Rect(WIDTH / 2 - 200, HEIGHT / 2, 400, 24)
 
 # --- Global Objects ---
-player = None
-platforms = []
-enemies = []
-projectiles = []
-score = 0
-coin = None
-is_coin_collected = False
-enemies_defeated = 0
+world = None
+scene = None
+simulation_thread = None
+server = None
+spectator = None
+input_lock = threading.Lock()
+pending_jump = False
+pending_shoot = False
 music_on = True
-
-# --- Classes ---
-class GameObject:
-    def __init__(self, x, y, width, height):
-        self.rect = Rect(x, y, width, height)
-        self.animation_frames_names = []
-        self.current_frame_index = 0
-        self.animation_timer = 0
-        self.animation_speed = 0.1
-
-    def set_animation_frames(self, frame_names):
-        if self.animation_frames_names != frame_names:
-            self.animation_frames_names = frame_names
-            self.current_frame_index = 0
-            self.animation_timer = 0
-
-    def animate(self, dt):
-        if not self.animation_frames_names or len(self.animation_frames_names) <= 1:
-            self.current_frame_index = 0
-            return
-        self.animation_timer += dt
-        if self.animation_timer >= self.animation_speed:
-            self.animation_timer = 0
-            self.current_frame_index = (self.current_frame_index + 1) % len(self.animation_frames_names)
-
-    def draw(self):
-        if not self.animation_frames_names:
-            screen.draw.rect(self.rect, (255, 0, 0))
-            return
-        current_image_name = self.animation_frames_names[self.current_frame_index]
-        try:
-            actor_to_draw = Actor(current_image_name)
-            actor_to_draw.pos = self.rect.center
-            if hasattr(self, 'invincibility_timer') and self.invincibility_timer > 0:
-                if int(self.invincibility_timer * 10) % 2 == 0:
-                    actor_to_draw.draw()
-            else:
-                actor_to_draw.draw()
-        except Exception as e:
-            print(f"Erro de criar Actor do '{current_image_name}': {e}.")
-            screen.draw.rect(self.rect, (255, 0, 0))
-
-class Player(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 40, 60)
-        self.vx, self.vy = 0, 0
-        self.on_ground = False
-        self.is_moving = False
-        self.is_running = False
-        self.facing_right = True
-        self.attack_cooldown = 0
-        self.is_attacking = False
-        self.attack_animation_timer = 0
-        
-        self.health = 5
-        self.max_health = 5
-        self.invincibility_timer = 0.0
-
-        self.attack_right_frames = ["hero_attack_right_0", "hero_attack_right_1"]
-        self.attack_left_frames = ["hero_attack_left_0", "hero_attack_left_1"]
-        self.idle_right_frames = ["hero_idle_right_0", "hero_idle_right_1"]
-        self.idle_left_frames = ["hero_idle_left_0", "hero_idle_left_1"]
-        self.walk_right_frames = ["hero_walk_right_0", "hero_walk_right_1"]
-        self.walk_left_frames = ["hero_walk_left_0", "hero_walk_left_1"]
-        self.run_right_frames = ["hero_run_right_0", "hero_run_right_1"]
-        self.run_left_frames = ["hero_run_left_0", "hero_run_left_1"]
-        self.set_animation_frames(self.idle_right_frames)
-
-    def update(self, dt, platforms):
-        if self.attack_cooldown > 0: self.attack_cooldown -= dt
-        if self.attack_animation_timer > 0:
-            self.attack_animation_timer -= dt
-            if self.attack_animation_timer <= 0: self.is_attacking = False
-        if self.invincibility_timer > 0: self.invincibility_timer -= dt
-        
-        if not self.is_attacking:
-            current_speed = PLAYER_RUN_SPEED if self.is_running else PLAYER_WALK_SPEED
-            if keyboard.left: self.vx, self.facing_right, self.is_moving = -current_speed, False, True
-            elif keyboard.right: self.vx, self.facing_right, self.is_moving = current_speed, True, True
-            else: self.vx, self.is_moving = 0, False
-        else:
-             self.vx, self.is_moving = 0, False
-
-        self.vy += GRAVITY
-        if self.vy > MAX_FALL_SPEED: self.vy = MAX_FALL_SPEED
-        self.rect.y += self.vy
-
-        self.on_ground = False
-        for p in platforms:
-            if self.rect.colliderect(p.rect) and self.vy > 0:
-                self.rect.bottom = p.rect.top
-                self.vy, self.on_ground = 0, True
-
-        self.rect.x += self.vx
-        for p in platforms:
-            if self.rect.colliderect(p.rect):
-                if self.vx > 0: self.rect.right = p.rect.left
-                elif self.vx < 0: self.rect.left = p.rect.right
-
-        if self.is_attacking:
-            self.set_animation_frames(self.attack_right_frames if self.facing_right else self.attack_left_frames)
-        elif self.is_moving:
-            if self.is_running: self.set_animation_frames(self.run_right_frames if self.facing_right else self.run_left_frames)
-            else: self.set_animation_frames(self.walk_right_frames if self.facing_right else self.walk_left_frames)
-        else:
-            self.set_animation_frames(self.idle_right_frames if self.facing_right else self.idle_left_frames)
-            
-        self.animate(dt)
-
-    def take_damage(self, amount):
-        if self.invincibility_timer <= 0:
-            self.health -= amount
-            self.invincibility_timer = 1.5
-            if music_on:
-                try: sounds.player_hit.play()
-                except Exception: pass
-
-    def jump(self):
-        if self.on_ground and not self.is_attacking and music_on:
-            self.vy = PLAYER_JUMP_VELOCITY
-            try: sounds.jump_sound.play()
-            except Exception as e: print(f"Não pode tocar o som de pulo: {e}")
-
-    def shoot(self):
-        if self.attack_cooldown <= 0:
-            self.attack_cooldown = ATTACK_COOLDOWN
-            self.is_attacking = True
-            self.attack_animation_timer = 0.3
-            if music_on:
-                try: sounds.shoot_sound.play()
-                except Exception as e: print(f"Não pode tocar o som de tiro: {e}")
-            projectiles.append(Projectile(self.rect.centerx, self.rect.centery, self.facing_right))
-
-    def on_key_down(self, key):
-        if key == keys.SPACE: self.jump()
-        if key == keys.LSHIFT or key == keys.RSHIFT: self.is_running = True
-        if key == keys.Z: self.shoot()
-
-    def on_key_up(self, key):
-        if key == keys.LSHIFT or key == keys.RSHIFT: self.is_running = False
-
-class Enemy(GameObject):
-    def __init__(self, x, y, patrol_start_x, patrol_end_x):
-        super().__init__(x, y, 40, 60)
-        self.vx, self.vy = 0, 0
-        self.on_ground = False
-        self.cooldown_timer = 0.0
-        self.patrol_start_x, self.patrol_end_x = patrol_start_x, patrol_end_x
-        self.facing_right = True
-        self.health = 3
-        self.is_aggro = False
-        
-        self.DEAGGRO_TIME = 5.0
-        self.deaggro_timer = 0.0
-        
-        self.STATE_PATROLLING, self.STATE_WAITING, self.STATE_ATTACKING = 'patrolling', 'waiting', 'attacking'
-        self.state = self.STATE_PATROLLING
-        self.patrol_timer = random.uniform(3.0, 6.0)
-        self.wait_timer = 0.0
-
-        self.attack_right_frames = ["enemy_attack_right_0", "enemy_attack_right_1"]
-        self.attack_left_frames = ["enemy_attack_left_0", "enemy_attack_left_1"]
-        self.idle_right_frames = ["enemy_idle_right_0", "enemy_idle_right_1"]
-        self.idle_left_frames = ["enemy_idle_left_0", "enemy_idle_left_1"]
-        self.walk_right_frames = ["enemy_walk_right_0", "enemy_walk_right_1"]
-        self.walk_left_frames = ["enemy_walk_left_0", "enemy_walk_left_1"]
-        self.run_right_frames = ["enemy_run_right_0", "enemy_run_right_1"]
-        self.run_left_frames = ["enemy_run_left_0", "enemy_run_left_1"]
-        self.set_animation_frames(self.walk_right_frames)
-
-    def on_hit(self):
-        if self.health > 0:
-            self.health -= 1
-            self.is_aggro = True
-            self.deaggro_timer = self.DEAGGRO_TIME
-
-    def update(self, dt, player, platforms):
-        if self.cooldown_timer > 0: self.cooldown_timer -= dt
-
-        if self.state == self.STATE_ATTACKING and self.current_frame_index == len(self.animation_frames_names) - 1:
-            self.state = self.STATE_PATROLLING
-
-        self.vy += GRAVITY
-        if self.vy > MAX_FALL_SPEED: self.vy = MAX_FALL_SPEED
-        self.rect.y += self.vy
-
-        self.on_ground = False
-        for p in platforms:
-            if self.rect.colliderect(p.rect) and self.vy >= 0:
-                self.rect.bottom = p.rect.top
-                self.vy, self.on_ground = 0, True
-
-        distance_to_player = math.hypot(self.rect.centerx - player.rect.centerx, self.rect.centery - player.rect.centery)
-        in_sight = distance_to_player < ENEMY_SIGHT_RANGE and abs(self.rect.y - player.rect.y) < 50
-        
-        if self.is_aggro:
-            if in_sight:
-                self.deaggro_timer = self.DEAGGRO_TIME
-            else:
-                self.deaggro_timer -= dt
-                if self.deaggro_timer <= 0:
-                    self.is_aggro = False
-        
-        is_pursuing = in_sight or self.is_aggro
-        
-        if self.rect.colliderect(player.rect) and self.cooldown_timer <= 0:
-            self.state = self.STATE_ATTACKING
-            self.cooldown_timer = ENEMY_ATTACK_COOLDOWN
-            player.take_damage(1)
-        
-        target_vx = 0
-        current_frames = self.animation_frames_names
-
-        if self.state == self.STATE_ATTACKING:
-            target_vx = 0
-            current_frames = self.attack_right_frames if self.facing_right else self.attack_left_frames
-        elif is_pursuing:
-            self.state = self.STATE_PATROLLING
-            if self.rect.centerx < player.rect.centerx:
-                target_vx, self.facing_right, current_frames = ENEMY_RUN_SPEED, True, self.run_right_frames
-            else:
-                target_vx, self.facing_right, current_frames = -ENEMY_RUN_SPEED, False, self.run_left_frames
-        else:
-            if self.state == self.STATE_PATROLLING:
-                target_vx = ENEMY_WALK_SPEED if self.facing_right else -ENEMY_WALK_SPEED
-                current_frames = self.walk_right_frames if self.facing_right else self.walk_left_frames
-                self.patrol_timer -= dt
-                if self.patrol_timer <= 0: self.state, self.wait_timer = self.STATE_WAITING, random.uniform(2.0, 4.0)
-            elif self.state == self.STATE_WAITING:
-                target_vx = 0
-                current_frames = self.idle_right_frames if self.facing_right else self.idle_left_frames
-                self.wait_timer -= dt
-                if self.wait_timer <= 0: self.state, self.patrol_timer = self.STATE_PATROLLING, random.uniform(3.0, 6.0)
-        
-        should_reverse = False
-        if target_vx != 0:
-            check_x = self.rect.right + ENEMY_EDGE_DETECTION_OFFSET if target_vx > 0 else self.rect.left - ENEMY_EDGE_DETECTION_OFFSET
-            check_rect = Rect(check_x, self.rect.bottom + 5, 1, 1)
-            on_ground_ahead = any(check_rect.colliderect(p.rect) for p in platforms)
-            if not on_ground_ahead and self.on_ground: should_reverse = True
-        
-        if not is_pursuing and self.state != self.STATE_ATTACKING:
-            if (target_vx > 0 and self.rect.right >= self.patrol_end_x) or \
-               (target_vx < 0 and self.rect.left <= self.patrol_start_x):
-                should_reverse = True
-
-        if should_reverse and self.state == self.STATE_PATROLLING: self.facing_right = not self.facing_right
-
-        self.vx = target_vx
-        self.rect.x += self.vx
-        for p in platforms:
-            if self.rect.colliderect(p.rect):
-                if self.vx > 0: self.rect.right = p.rect.left
-                elif self.vx < 0: self.rect.left = p.rect.right
-
-        self.set_animation_frames(current_frames)
-        self.animate(dt)
-
-class Projectile:
-    def __init__(self, x, y, is_facing_right):
-        self.rect = Rect(x - 5, y - 5, 10, 10)
-        self.direction = 1 if is_facing_right else -1
-    def update(self): self.rect.x += PROJECTILE_SPEED * self.direction
-    def draw(self): screen.draw.filled_circle(self.rect.center, 5, 'orange')
-
-class Platform:
-    def __init__(self, x, y, width, height):
-        self.rect = Rect(x, y, width, height)
-        self.image_asset = getattr(images, 'platform', None)
-        if not self.image_asset: print("Erro: Imagem plataforma 'platform.png' não foi encontrado.")
-    def draw(self):
-        if self.image_asset: screen.blit(self.image_asset, self.rect)
-        else: screen.draw.filled_rect(self.rect, (100, 100, 100))
-
-class Coin(GameObject):
-    def __init__(self, x, y):
-        super().__init__(x, y, 24, 24)
-        num_frames = 30 
-        self.animation_frames_names = [f"coin_{i}" for i in range(num_frames)]
-        
-        self.set_animation_frames(self.animation_frames_names)
-        self.animation_speed = 0.1
-
-    def draw(self):
-        if not self.animation_frames_names:
-            screen.draw.rect(self.rect, (255, 0, 0))
-            return
-        current_image_name = self.animation_frames_names[self.current_frame_index]
-        
-        try:
-            actor_to_draw = Actor(current_image_name)
-            actor_to_draw.scale = 0.1
-            actor_to_draw.pos = self.rect.center
-            actor_to_draw.draw()
-        except Exception as e:
-            print(f"Erro de criar Actor do '{current_image_name}': {e}.")
-            screen.draw.rect(self.rect, (255, 0, 0))
+sprite_cache = SpriteCache()
+platform_image = None
+background_image = None
+asset_manifest = None
+preloader = None
+recorder = None
+replay_player = None
+replay_clock = 0.0
+checkpoints = Checkpoints()
+save_slots = SaveSlots()
+save_request = None
+static_scene = None
+static_camera_x = None
+static_platforms = None
+previous_dirty_rects = []
+frame_dirty_rects = None
+profiler = None
+profiler_overlay_visible = True
+profiler_overlay_lines = []
+
+event_bus = EventBus()
+audio = None
+
+# --- Rendering ---
+# The draw functions read from scene: the world itself, or with --threaded an
+# interpolated snapshot of it. World coordinates are shifted by the camera;
+# only the x axis scrolls.
+def to_screen(rect): return rect.move(-scene.camera_x, 0)
+
+def on_screen(rect): return rect.right > scene.camera_x and rect.left < scene.camera_x + WIDTH
+
+def draw_game_object(obj):
+    if not on_screen(obj.rect): return None
+    rect = to_screen(obj.rect)
+    if not obj.animation_frames_names:
+        screen.draw.rect(rect, (255, 0, 0))
+        return rect
+    current_image_name = obj.animation_frames_names[obj.current_frame_index]
+    if hasattr(obj, 'invincibility_timer') and obj.invincibility_timer > 0:
+        if int(obj.invincibility_timer * 10) % 2 != 0: return None
+    try:
+        return sprite_cache.blit_centered(screen, current_image_name, rect.center, obj.image_scale)
+    except Exception as e:
+        print(f"Erro de carregar sprite '{current_image_name}': {e}.")
+        screen.draw.rect(rect, (255, 0, 0))
+        return rect
+
+def draw_projectile(projectile):
+    x, y = projectile.rect.centerx - scene.camera_x, projectile.rect.centery
+    screen.draw.filled_circle((x, y), 5, 'orange')
+    return Rect(x - 6, y - 6, 12, 12)
+
+def draw_platform(platform, target=None):
+    if not on_screen(platform.rect): return
+    target = target or screen
+    rect = to_screen(platform.rect)
+    if platform_image: target.blit(platform_image, rect)
+    else: target.draw.filled_rect(rect, (100, 100, 100))
+
+# --- Asset Loading ---
+def start_loading():
+    global asset_manifest, preloader, audio
+    asset_manifest = build_manifest()
+    preloader = AssetPreloader(asset_manifest, lazy_sounds=options.lazy_audio).start()
+    audio = event_bus.subscribe(AudioDispatcher(sounds, music, preloader.sound_ready, music_on))
+
+def load_image(name):
+    # Only names from the manifest, so a missing image is not probed on disk every frame.
+    return getattr(images, name) if preloader.has_image(name) else None
+
+def finish_loading():
+    global current_game_state, background_image
+    for error in preloader.errors: print(f"Não pode carregar o recurso {error}")
+    background_image = load_image('background')
+    current_game_state = GAME_STATE_MENU
+    audio.play_music()
+    if options.spectate: start_spectating()
+
+def draw_loading_screen():
+    screen.fill((0, 0, 0))
+    screen.draw.text("Carregando...", center=(WIDTH / 2, HEIGHT / 2 - 40), color="white", fontsize=40)
+    screen.draw.rect(LOADING_BAR_RECT, "white")
+    fill = LOADING_BAR_RECT.inflate(-6, -6)
+    fill.width = int(fill.width * preloader.progress)
+    screen.draw.filled_rect(fill, (50, 200, 50))
 
 # --- Game Functions ---
 def setup_level():
-    global player, platforms, enemies, projectiles, score, coin, is_coin_collected, enemies_defeated
-    score = 0
-    is_coin_collected = False
-    enemies_defeated = 0
-    player = Player(100, 400)
-    platforms = [
-        Platform(0, 500, 800, 50), Platform(150, 400, 200, 30),
-        Platform(450, 350, 150, 30), Platform(600, 250, 100, 30)
-    ]
-    top_platform = platforms[-1]
-    coin_x = top_platform.rect.centerx
-    coin_y = top_platform.rect.top - 16
-    coin = Coin(coin_x, coin_y)
-    
-    enemies = [ Enemy(160, 340, 150, 350), Enemy(460, 290, 450, 600) ]
-    projectiles = []
-    player.rect.topleft = (100, 400)
+    global world, scene, platform_image, pending_jump, pending_shoot, recorder, replay_player, replay_clock, save_request
+    stop_simulation_thread()
+    level = load_level(options.level) if options.level else None
+    if options.replay:
+        try: replay_player = ReplayPlayer(load_replay(options.replay), level)
+        except (OSError, ValueError) as e:
+            print(f"Não pode reproduzir o replay: {e}")
+            exit()
+        replay_clock = 0.0
+        world = replay_player.world
+    else:
+        world = World(level=level)
+        if options.record: recorder = Recorder(world)
+    world.bus = event_bus
+    scene = world
+    pending_jump = pending_shoot = False
+    save_request = None
+    checkpoints.clear()
+    if options.load and not replay_player: load_slot()
+    platform_image = load_image('platform')
+    if not platform_image: print("Erro: Imagem plataforma 'platform.png' não foi encontrado.")
+    try: sprite_cache.preload(world.coin.animation_frames_names, world.coin.image_scale)
+    except Exception as e: print(f"Não pode pré-carregar os frames da moeda: {e}")
+    if options.dirty_rects: build_static_scene()
+    if options.threaded: start_simulation_thread()
+
+def render_health(health_key):
+    health, max_health = health_key
+    layer = new_layer((max_health * 35, 30), transparent=True)
+    heart_full = getattr(images, 'heart_full', None)
+    heart_empty = getattr(images, 'heart_empty', None)
+    for i in range(max_health):
+        heart_image = heart_full if i < health else heart_empty
+        if heart_image: layer.blit(heart_image, (i * 35, 0))
+        else:
+            color = "red" if i < health else (50, 50, 50)
+            layer.draw.filled_rect(Rect(i * 35, 0, 30, 30), color)
+    return layer.surface
+
+def render_score(score):
+    return text_surface(f"Pontuação: {score}", color="black", fontsize=40)
+
+def render_menu(music_on):
+    layer = new_layer((WIDTH, HEIGHT))
+    layer.fill((0, 0, 50))
+    layer.draw.text("Lutador Vs Samurai Plataforma", center=(WIDTH / 2, HEIGHT / 4), color="white", fontsize=60)
+    layer.draw.filled_rect(START_BUTTON, (0, 150, 0))
+    layer.draw.text("Começar Jogo", center=START_BUTTON.center, color="white", fontsize=40)
+    music_text = "Música/Sons: ON" if music_on else "Música/Sons: OFF"
+    layer.draw.filled_rect(MUSIC_BUTTON, (150, 0, 150))
+    layer.draw.text(music_text, center=MUSIC_BUTTON.center, color="white", fontsize=30)
+    layer.draw.filled_rect(EXIT_BUTTON, (150, 0, 0))
+    layer.draw.text("Sair", center=EXIT_BUTTON.center, color="white", fontsize=40)
+    return layer.surface
+
+def render_game_over(can_retry):
+    layer = new_layer((WIDTH, HEIGHT))
+    layer.fill((50, 0, 0))
+    layer.draw.text("FIM DE JOGO", center=(WIDTH / 2, HEIGHT / 2 - 50), color="white", fontsize=80)
+    layer.draw.text("Pressione qualquer tecla para voltar ao menu", center=(WIDTH / 2, HEIGHT / 2 + 50), color="white", fontsize=30)
+    if can_retry: layer.draw.text("R: tentar de novo do último checkpoint", center=(WIDTH / 2, HEIGHT / 2 + 90), color="white", fontsize=30)
+    return layer.surface
+
+def render_victory_screen(score):
+    layer = new_layer((WIDTH, HEIGHT))
+    layer.fill((20, 100, 20))
+    layer.draw.text("VITÓRIA", center=(WIDTH / 2, HEIGHT / 2 - 50), color="yellow", fontsize=80)
+    layer.draw.text(f"Pontuação Final: {score}", center=(WIDTH / 2, HEIGHT / 2 + 20), color="white", fontsize=40)
+    layer.draw.text("Pressione qualquer tecla para voltar ao menu", center=(WIDTH / 2, HEIGHT / 2 + 70), color="white", fontsize=30)
+    return layer.surface
+
+health_layer = CachedLayer(render_health)
+score_layer = CachedLayer(render_score)
+menu_layer = CachedLayer(render_menu)
+game_over_layer = CachedLayer(render_game_over)
+victory_layer = CachedLayer(render_victory_screen)
 
 def draw_player_health():
-    for i in range(player.max_health):
-        heart_image = 'heart_full' if i < player.health else 'heart_empty'
-        try:
-            screen.blit(heart_image, (10 + i * 35, 10))
-        except Exception:
-            color = "red" if i < player.health else (50, 50, 50)
-            screen.draw.filled_rect(Rect(10 + i * 35, 10, 30, 30), color)
-
-def draw_menu():
-    screen.clear()
-    screen.fill((0, 0, 50))
-    screen.draw.text("Lutador Vs Samurai Plataforma", center=(WIDTH / 2, HEIGHT / 4), color="white", fontsize=60)
-    start_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 - 30, 200, 60)
-    screen.draw.filled_rect(start_button, (0, 150, 0))
-    screen.draw.text("Começar Jogo", center=start_button.center, color="white", fontsize=40)
-    music_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 50, 200, 60)
-    music_text = "Música/Sons: ON" if music_on else "Música/Sons: OFF"
-    screen.draw.filled_rect(music_button, (150, 0, 150))
-    screen.draw.text(music_text, center=music_button.center, color="white", fontsize=30)
-    exit_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 130, 200, 60)
-    screen.draw.filled_rect(exit_button, (150, 0, 0))
-    screen.draw.text("Sair", center=exit_button.center, color="white", fontsize=40)
-
-def draw_game_over():
-    screen.clear()
-    screen.fill((50, 0, 0))
-    screen.draw.text("FIM DE JOGO", center=(WIDTH / 2, HEIGHT / 2 - 50), color="white", fontsize=80)
-    screen.draw.text("Pressione qualquer tecla para voltar ao menu", center=(WIDTH / 2, HEIGHT / 2 + 50), color="white", fontsize=30)
-
-def draw_victory_screen():
-    screen.clear()
-    screen.fill((20, 100, 20))
-    screen.draw.text("VITÓRIA", center=(WIDTH / 2, HEIGHT / 2 - 50), color="yellow", fontsize=80)
-    screen.draw.text(f"Pontuação Final: {score}", center=(WIDTH / 2, HEIGHT / 2 + 20), color="white", fontsize=40)
-    screen.draw.text("Pressione qualquer tecla para voltar ao menu", center=(WIDTH / 2, HEIGHT / 2 + 70), color="white", fontsize=30)
+    health_surface = health_layer.get((scene.player.health, scene.player.max_health))
+    screen.blit(health_surface, (10, 10))
+    return health_surface.get_rect(topleft=(10, 10))
+
+def draw_menu(): screen.blit(menu_layer.get(music_on), (0, 0))
+
+def draw_game_over(): screen.blit(game_over_layer.get(checkpoints.available), (0, 0))
+
+def draw_victory_screen(): screen.blit(victory_layer.get(scene.score), (0, 0))
 
 def on_mouse_down(pos):
     global current_game_state, music_on
     if current_game_state == GAME_STATE_MENU:
-        start_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 - 30, 200, 60)
-        music_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 50, 200, 60)
-        exit_button = Rect(WIDTH / 2 - 100, HEIGHT / 2 + 130, 200, 60)
-        if start_button.collidepoint(pos):
+        if START_BUTTON.collidepoint(pos):
             current_game_state = GAME_STATE_PLAYING
             setup_level()
-            if music_on:
-                try: music.play("background_music"); music.set_volume(0.5)
-                except Exception as e: print(f"Não pode tocar a musica de background: {e}")
-        elif music_button.collidepoint(pos):
+            audio.play_music()
+        elif MUSIC_BUTTON.collidepoint(pos):
             music_on = not music_on
-            if music_on:
-                try: music.play("background_music"); music.set_volume(0.5)
-                except Exception as e: print(f"Não pode tocar a musica de background: {e}")
-            else: music.stop()
-        elif exit_button.collidepoint(pos): exit()
+            audio.set_enabled(music_on)
+        elif EXIT_BUTTON.collidepoint(pos): exit()
 
 def on_key_down(key):
-    global current_game_state
-    if current_game_state == GAME_STATE_PLAYING: player.on_key_down(key)
+    global current_game_state, pending_jump, pending_shoot, profiler_overlay_visible, save_request
+    if profiler and key == keys.F3: profiler_overlay_visible = not profiler_overlay_visible
+    if spectator: return
+    if current_game_state == GAME_STATE_PLAYING:
+        with input_lock:
+            if key == keys.SPACE: pending_jump = True
+            if key == keys.Z: pending_shoot = True
+            if key == keys.F5: save_request = 'save'
+            if key == keys.F9: save_request = 'load'
+    elif current_game_state == GAME_STATE_GAME_OVER and key == keys.R and checkpoints.available: retry_from_checkpoint()
     elif current_game_state == GAME_STATE_GAME_OVER or current_game_state == GAME_STATE_VICTORY:
         current_game_state = GAME_STATE_MENU
-        if music_on:
-             try: music.play("background_music")
-             except Exception as e: print(f"Não pode tocar a musica de background no menu: {e}")
-
-def on_key_up(key):
-    if current_game_state == GAME_STATE_PLAYING: player.on_key_up(key)
-
-def update(dt):
-    global current_game_state, projectiles, enemies, score, is_coin_collected, enemies_defeated
-    if current_game_state == GAME_STATE_PLAYING:
-        player.update(dt, platforms)
-        
-        if not is_coin_collected:
-            coin.animate(dt)
-            if player.rect.colliderect(coin.rect):
-                is_coin_collected = True
-                score += 3
-                if music_on:
-                    try: sounds.coin_collect.play()
-                    except Exception as e: print(f"Não pode tocar o som de coleta de moeda: {e}")
-        
-        projectiles_to_remove = []
-        enemies_to_remove = []
-        for p in projectiles:
-            p.update()
-            if not (0 < p.rect.x < WIDTH): projectiles_to_remove.append(p)
-            for enemy in enemies:
-                if p.rect.colliderect(enemy.rect):
-                    enemy.on_hit()
-                    if p not in projectiles_to_remove: projectiles_to_remove.append(p)
-                    if enemy.health <= 0 and enemy not in enemies_to_remove:
-                        score += 1
-                        enemies_defeated += 1
-                        enemies_to_remove.append(enemy)
-        
-        projectiles = [p for p in projectiles if p not in projectiles_to_remove]
-        enemies = [e for e in enemies if e not in enemies_to_remove]
-
-        for enemy in enemies: enemy.update(dt, player, platforms)
+        audio.play_music()
+
+def read_inputs():
+    # Also called from the simulation thread with --threaded.
+    global pending_jump, pending_shoot
+    with input_lock:
+        inputs = Inputs(keyboard.left, keyboard.right, keyboard.lshift or keyboard.rshift, pending_jump, pending_shoot)
+        pending_jump = pending_shoot = False
+    return inputs
+
+def save_recording():
+    if recorder:
+        try: recorder.save(options.record)
+        except Exception as e: print(f"Não pode salvar o replay: {e}")
+
+atexit.register(save_recording)
+
+def step_replay(dt):
+    global replay_clock, current_game_state
+    replay_clock += dt * options.speed
+    ticks = int(replay_clock / FIXED_DT)
+    replay_clock -= ticks * FIXED_DT
+    replay_player.advance(ticks)
+    if replay_player.finished and world.status == WORLD_PLAYING: current_game_state = GAME_STATE_MENU
+
+# --- Threaded Simulation ---
+# With --threaded the world ticks on its own thread at the fixed rate and the
+# frame only draws the snapshots it publishes; update() just watches for the
+# end of the match.
+def simulation_step():
+    if replay_player:
+        replay_player.advance(1)
+        return not replay_player.finished
+    world.tick(read_inputs())
+    service_save_states()
+    if server: server.publish(world)
+    return world.status == WORLD_PLAYING
+
+def start_simulation_thread():
+    global simulation_thread
+    tick_rate = (options.speed if replay_player else 1.0) / FIXED_DT
+    simulation_thread = SimulationThread(world, simulation_step, tick_rate)
+    simulation_thread.start()
+
+def stop_simulation_thread():
+    global simulation_thread
+    if simulation_thread: simulation_thread.stop()
+    simulation_thread = None
+
+def update_scene(dt):
+    global current_game_state
+    if current_game_state == GAME_STATE_LOADING:
+        preloader.install()
+        if preloader.ready: finish_loading()
+    elif spectator: follow_spectator()
+    elif current_game_state == GAME_STATE_PLAYING:
+        if simulation_thread:
+            if simulation_thread.is_alive(): return
+            stop_simulation_thread()
+            if replay_player and world.status == WORLD_PLAYING: current_game_state = GAME_STATE_MENU
+        elif replay_player: step_replay(dt)
+        else:
+            world.step(read_inputs(), dt)
+            service_save_states()
+        world.sync_views()
+        if server: server.publish(world)
         
-        if enemies_defeated >= 2 and is_coin_collected:
+        if world.status == WORLD_VICTORY:
             current_game_state = GAME_STATE_VICTORY
-            music.stop()
-        elif player.health <= 0 or player.rect.y > HEIGHT + 50:
+            audio.stop_music()
+            save_recording()
+        elif world.status == WORLD_GAME_OVER:
             current_game_state = GAME_STATE_GAME_OVER
-            music.stop()
-
-def draw():
-    if current_game_state == GAME_STATE_MENU: draw_menu()
+            audio.stop_music()
+            save_recording()
+
+# --- Save States ---
+# F5 saves the world to the --slot file and F9 loads it back. A checkpoint is
+# kept every few seconds and R on the game over screen retries from the latest
+# one. Requests are handled between ticks, on the simulation thread with
+# --threaded; replays never save.
+def service_save_states():
+    global save_request
+    with input_lock: request, save_request = save_request, None
+    if request == 'save':
+        try: print(f"Estado salvo no slot {options.slot} ({save_slots.save(world, options.slot)} bytes).")
+        except (OSError, ValueError) as e: print(f"Não pode salvar o estado: {e}")
+    elif request == 'load': load_slot()
+    checkpoints.update(world)
+
+def load_slot():
+    global recorder
+    try: save_slots.load(world, options.slot)
+    except (OSError, ValueError) as e:
+        print(f"Não pode carregar o slot {options.slot}: {e}")
+        return
+    print(f"Slot {options.slot} carregado.")
+    checkpoints.clear()
+    if recorder:
+        # The recording starts at tick 0, so a loaded state can't be replayed from it.
+        print("A gravação do replay foi interrompida.")
+        recorder = world.recorder = None
+
+def retry_from_checkpoint():
+    global current_game_state
+    checkpoints.restore(world)
+    if recorder: del recorder.masks[world.tick_count:]
+    current_game_state = GAME_STATE_PLAYING
+    audio.play_music()
+    if options.threaded: start_simulation_thread()
+
+# --- Network ---
+# --serve streams every tick to spectators; --spectate draws the frames
+# streamed by a server (another Jogo.py --serve, or net.py) instead of running
+# a world, and the screens follow the server's match.
+SPECTATED_STATES = {WORLD_PLAYING: GAME_STATE_PLAYING, WORLD_VICTORY: GAME_STATE_VICTORY,
+                    WORLD_GAME_OVER: GAME_STATE_GAME_OVER}
+
+def start_server():
+    global server
+    server = SnapshotServer(options.serve)
+    print(f"Transmitindo em {server.address[0]}:{server.address[1]}")
+    atexit.register(stop_server)
+
+def stop_server():
+    server.close()
+    for line in server.stats.report_lines(): print(line)
+
+def start_spectating():
+    global spectator, current_game_state, platform_image
+    host, _, port = options.spectate.rpartition(':')
+    try: spectator = SnapshotClient(host or '127.0.0.1', int(port))
+    except (OSError, ValueError) as e:
+        print(f"Não pode conectar a {options.spectate}: {e}")
+        return
+    spectator.start()
+    platform_image = load_image('platform')
+    current_game_state = GAME_STATE_WAITING
+
+def follow_spectator():
+    global spectator, current_game_state, scene
+    if not spectator.is_alive():
+        print("A transmissão terminou.")
+        spectator = None
+        current_game_state = GAME_STATE_MENU
+        return
+    if spectator.latest:
+        scene = spectator.latest
+        current_game_state = SPECTATED_STATES[scene.status]
+
+def draw_waiting_screen():
+    screen.fill((0, 0, 0))
+    screen.draw.text(f"Aguardando partida em {options.spectate}...", center=(WIDTH / 2, HEIGHT / 2), color="white", fontsize=32)
+
+def draw_background(target=None):
+    target = target or screen
+    target.clear()
+    if background_image: target.blit(background_image, (0, 0))
+    else: target.fill((135, 206, 235))
+
+def draw_platforms():
+    for p in scene.platforms: draw_platform(p)
+
+def draw_actors():
+    drawn = [draw_game_object(e) for e in scene.enemies]
+    drawn += [draw_projectile(proj) for proj in scene.projectiles]
+    
+    if not scene.is_coin_collected:
+        drawn.append(draw_game_object(scene.coin))
+    
+    drawn.append(draw_game_object(scene.player))
+    return drawn
+
+def draw_score():
+    score_surface = score_layer.get(scene.score)
+    score_rect = score_surface.get_rect(center=(WIDTH / 2, 30))
+    screen.blit(score_surface, score_rect)
+    return score_rect
+
+# --- Dirty Rectangles ---
+# Platforms never move, so in --dirty-rects mode the background and platforms
+# are composited once per level. Each frame only the areas covered by moving
+# things last frame are restored from that surface, and only those areas plus
+# the new ones are pushed to the display. When the camera scrolls the scene
+# is composited again and the whole screen is pushed.
+def build_static_scene():
+    global static_scene, static_camera_x, static_platforms, previous_dirty_rects
+    layer = new_layer((WIDTH, HEIGHT))
+    draw_background(layer)
+    for p in scene.platforms: draw_platform(p, layer)
+    static_scene = layer.surface
+    static_camera_x = scene.camera_x
+    static_platforms = scene.platforms
+    previous_dirty_rects = None
+
+def draw_playing_dirty():
+    global previous_dirty_rects, frame_dirty_rects
+    surface = screen.surface
+    if scene.camera_x != static_camera_x or scene.platforms is not static_platforms: build_static_scene()
+    if previous_dirty_rects is None:
+        surface.blit(static_scene, (0, 0))
+        restored = [surface.get_rect()]
+    else:
+        restored = previous_dirty_rects
+        for rect in restored: surface.blit(static_scene, rect, rect)
+    drawn = [rect for rect in draw_actors() if rect]
+    drawn.append(draw_player_health())
+    drawn.append(draw_score())
+    if profiler and profiler_overlay_visible: drawn.append(PROFILER_PANEL_RECT)
+    previous_dirty_rects = drawn
+    frame_dirty_rects = restored + drawn
+
+display_flip = pygame.display.flip
+
+# pgzero always calls pygame.display.flip() after draw(); in dirty-rect mode
+# that call pushes only the rectangles collected by draw_playing_dirty().
+def flip_dirty_rects():
+    if frame_dirty_rects is not None: pygame.display.update(frame_dirty_rects)
+    else: display_flip()
+
+pygame_clock = pygame.time.Clock
+
+# pgzero's main loop always calls clock.tick(60). With --threaded and
+# --spectate the frames interpolate by time, so drawing faster than the
+# ticks still shows new positions; this clock applies --fps instead.
+class RenderClock:
+    def __init__(self): self.clock = pygame_clock()
+    def tick(self, framerate=0): return self.clock.tick(options.fps)
+
+def draw_profiler_overlay():
+    global profiler_overlay_lines
+    if profiler.frame_count % 30 == 0: profiler_overlay_lines = profiler.report_lines()
+    if not profiler_overlay_visible: return
+    screen.draw.filled_rect(PROFILER_PANEL_RECT, (0, 0, 0))
+    for i, line in enumerate(profiler_overlay_lines):
+        screen.draw.text(line, topleft=(PROFILER_PANEL_RECT.x + 5, PROFILER_PANEL_RECT.y + 5 + 16 * i), color="white", fontsize=16)
+
+def draw_scene():
+    global frame_dirty_rects, scene
+    frame_dirty_rects = None
+    if current_game_state == GAME_STATE_PLAYING: scene = current_scene()
+    if current_game_state == GAME_STATE_LOADING: draw_loading_screen()
+    elif current_game_state == GAME_STATE_MENU: draw_menu()
+    elif current_game_state == GAME_STATE_PLAYING and options.dirty_rects: draw_playing_dirty()
     elif current_game_state == GAME_STATE_PLAYING:
-        screen.clear()
-        if hasattr(images, 'background'): screen.blit(images.background, (0, 0))
-        else: screen.fill((135, 206, 235))
-        for p in platforms: p.draw()
-        for e in enemies: e.draw()
-        for proj in projectiles: proj.draw()
-        
-        if not is_coin_collected:
-            coin.draw()
-        
-        player.draw()
+        draw_background()
+        draw_platforms()
+        draw_actors()
         draw_player_health()
-        screen.draw.text(f"Pontuação: {score}", center=(WIDTH / 2, 30), color="black", fontsize=40)
+        draw_score()
     elif current_game_state == GAME_STATE_GAME_OVER: draw_game_over()
     elif current_game_state == GAME_STATE_VICTORY: draw_victory_screen()
+    elif current_game_state == GAME_STATE_WAITING: draw_waiting_screen()
 
-if music_on:
-    try:
-        music.play("background_music")
-        music.set_volume(0.5)
-    except Exception as e:
-        print(f"Não pode tocar a musica de background no começo: {e}")
+def current_scene():
+    if spectator: return spectator.scene()
+    return simulation_thread.scene() if simulation_thread else world
+
+# pgzero inspects update/draw directly, so the profiler wraps the inner
+# update_scene/draw_scene instead.
+def update(dt): update_scene(dt)
 
+def draw():
+    draw_scene()
+    if profiler:
+        draw_profiler_overlay()
+        profiler.end_frame()
+
+def start_profiler():
+    global profiler
+    profiler = Profiler()
+    module = globals()
+    profiler.instrument(simulation.World, 'tick', 'World.tick')
+    profiler.instrument(simulation.Player, 'update', 'Player.update')
+    profiler.instrument(simulation.Enemy, 'update', 'Enemy.update')
+    profiler.instrument(simulation.Enemy, 'fast_forward', 'Enemy.fast_forward')
+    profiler.instrument(simulation.World, 'update_projectiles', 'World.update_projectiles')
+    profiler.instrument(module, 'update_scene', 'update')
+    profiler.instrument(module, 'draw_scene', 'draw')
+    for name in ('draw_background', 'draw_platforms', 'draw_actors', 'draw_player_health', 'draw_score'):
+        profiler.instrument(module, name, name)
+    if options.profile_out:
+        atexit.register(lambda: profiler.export(options.profile_out))
+
+if options.profile: start_profiler()
+if options.serve: start_server()
+if options.dirty_rects: pygame.display.flip = flip_dirty_rects
+if options.threaded or options.spectate: pygame.time.Clock = RenderClock
+
+start_loading()
 pgzrun.go()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import deque
+import pygame
+from pgzero import loaders
+
+ASSET_DIRS = {
+    'images': ('.png', '.gif', '.jpg', '.jpeg', '.bmp'),
+    'sounds': ('.wav', '.ogg', '.oga'),
+    'music': ('.mp3', '.ogg', '.oga'),
+}
+
+# --- Manifest ---
+def build_manifest(root=None):
+    root = root or loaders.root
+    manifest = {}
+    for kind, extensions in ASSET_DIRS.items():
+        folder = os.path.join(root, kind)
+        entries = []
+        if os.path.isdir(folder):
+            for filename in sorted(os.listdir(folder)):
+                name, ext = os.path.splitext(filename)
+                if ext.lower() in extensions: entries.append((name, os.path.join(folder, filename)))
+        manifest[kind] = entries
+    return manifest
+
+def cache_key(name):
+    return loaders.ResourceLoader.cache_key(name, (), {})
+
+# --- Preloader ---
+# Files are decoded on a worker thread. Images still have to be converted to
+# the display format on the main thread, so install() hands them to pgzero's
+# loader caches a few at a time from update(). Sounds need no conversion and
+# are put straight into the sound cache by the worker. With lazy_sounds the
+# menu opens as soon as the images are in, and sounds keep decoding behind it.
+class AssetPreloader:
+    def __init__(self, manifest, lazy_sounds=False):
+        self.images = manifest.get('images', [])
+        self.sounds = manifest.get('sounds', [])
+        self.image_names = {name for name, _ in self.images}
+        self.lazy_sounds = lazy_sounds
+        self.decoded_images = deque()
+        self.installed_images = 0
+        self.failed_images = 0
+        self.loaded_sounds = 0
+        self.errors = []
+        self.thread = threading.Thread(target=self._decode, name='asset-preloader', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _decode(self):
+        for name, path in self.images:
+            try: self.decoded_images.append((name, pygame.image.load(path)))
+            except Exception as e:
+                # Counted as done so loading still finishes; load_image() then treats it as missing.
+                self.errors.append(f"{name}: {e}")
+                self.image_names.discard(name)
+                self.failed_images += 1
+        for name, path in self.sounds:
+            try: loaders.sounds.cache[cache_key(name)] = pygame.mixer.Sound(path)
+            except Exception as e: self.errors.append(f"{name}: {e}")
+            self.loaded_sounds += 1
+
+    def install(self, max_items=8):
+        installed = []
+        while self.decoded_images and len(installed) < max_items:
+            name, surface = self.decoded_images.popleft()
+            loaders.images.cache[cache_key(name)] = surface.convert_alpha()
+            installed.append(name)
+        self.installed_images += len(installed)
+        return installed
+
+    def has_image(self, name):
+        return name in self.image_names
+
+    def sound_ready(self, name):
+        # A sound still decoding (or missing) is skipped rather than loaded on the main thread.
+        return cache_key(name) in loaders.sounds.cache
+
+    @property
+    def total(self):
+        return len(self.images) + (0 if self.lazy_sounds else len(self.sounds))
+
+    @property
+    def progress(self):
+        done = self.installed_images + self.failed_images + (0 if self.lazy_sounds else self.loaded_sounds)
+        return done / self.total if self.total else 1.0
+
+    @property
+    def ready(self):
+        return self.progress >= 1.0
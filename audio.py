@@ -0,0 +1,63 @@
+import queue
+import threading
+
+# event -> (sound name, message printed the first time it fails to play)
+SOUND_EVENTS = {
+    'player_hit': ('player_hit', None),
+    'jump': ('jump_sound', "Não pode tocar o som de pulo"),
+    'shoot': ('shoot_sound', "Não pode tocar o som de tiro"),
+    'coin': ('coin_collect', "Não pode tocar o som de coleta de moeda"),
+}
+MAX_VOICES_PER_BATCH = 4
+MAX_VOICES_PER_SOUND = 2
+
+# --- Audio Dispatcher ---
+# Subscribed to the event bus. Each batch is collapsed to one voice per event
+# kind (ten shots in a tick play one shot sound), capped, and handed to a
+# worker thread that does the actual playback. The music_on toggle lives here
+# too, so turning sound off is a single switch.
+class AudioDispatcher:
+    def __init__(self, sounds, music, sound_ready=lambda name: True, enabled=True):
+        self.sounds = sounds
+        self.music = music
+        self.sound_ready = sound_ready
+        self.enabled = enabled
+        self.failed = set()
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._play_batches, name='audio', daemon=True)
+        self.thread.start()
+
+    def __call__(self, events):
+        if not self.enabled or not events: return
+        batch = []
+        for event in dict.fromkeys(events):
+            if event not in SOUND_EVENTS: continue
+            sound_name, error_message = SOUND_EVENTS[event]
+            if self.sound_ready(sound_name): batch.append((sound_name, error_message))
+        if batch: self.queue.put(batch[:MAX_VOICES_PER_BATCH])
+
+    def _play_batches(self):
+        while True:
+            for sound_name, error_message in self.queue.get():
+                try:
+                    sound = getattr(self.sounds, sound_name)
+                    if sound.get_num_channels() < MAX_VOICES_PER_SOUND: sound.play()
+                except Exception as e:
+                    if error_message and sound_name not in self.failed: print(f"{error_message}: {e}")
+                    self.failed.add(sound_name)
+
+    def play_music(self, name="background_music", volume=0.5):
+        if not self.enabled: return
+        try:
+            self.music.play(name)
+            self.music.set_volume(volume)
+        except Exception as e:
+            print(f"Não pode tocar a musica de background: {e}")
+
+    def stop_music(self):
+        self.music.stop()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled: self.play_music()
+        else: self.stop_music()
@@ -0,0 +1,230 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+import simulation
+from simulation import (
+    Enemy, CLIP_ATTACK, CLIP_IDLE, CLIP_WALK, CLIP_RUN, STATE_PATROLLING, STATE_WAITING, STATE_ATTACKING
+)
+
+ENEMY_WIDTH, ENEMY_HEIGHT = 40, 60
+PROJECTILE_SIZE = 10
+
+def require_numpy():
+    if np is None: raise ImportError("O modo em lote precisa do numpy: pip install numpy")
+
+def to_rect_coord(values):
+    # Same rounding pygame applies when a float is assigned to a Rect attribute:
+    # halves go away from zero (-0.5 -> -1), unlike floor(v + 0.5).
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+def overlaps(left, top, width, height, other_left, other_top, other_right, other_bottom):
+    return (left < other_right) & (left + width > other_left) & (top < other_bottom) & (top + height > other_top)
+
+# --- Enemy Batch ---
+class EnemyBatch:
+    def __init__(self, enemies, rng):
+        require_numpy()
+        self.rng = rng
+        self.views = list(enemies)
+        self.x = np.array([e.rect.x for e in enemies], dtype=float)
+        self.y = np.array([e.rect.y for e in enemies], dtype=float)
+        self.vx = np.array([e.vx for e in enemies], dtype=float)
+        self.vy = np.array([e.vy for e in enemies], dtype=float)
+        self.cooldown_timer = np.array([e.cooldown_timer for e in enemies], dtype=float)
+        self.patrol_start_x = np.array([e.patrol_start_x for e in enemies], dtype=float)
+        self.patrol_end_x = np.array([e.patrol_end_x for e in enemies], dtype=float)
+        self.facing_right = np.array([e.facing_right for e in enemies], dtype=bool)
+        self.on_ground = np.array([e.on_ground for e in enemies], dtype=bool)
+        self.health = np.array([e.health for e in enemies], dtype=np.int32)
+        self.is_aggro = np.array([e.is_aggro for e in enemies], dtype=bool)
+        self.deaggro_timer = np.array([e.deaggro_timer for e in enemies], dtype=float)
+        self.state = np.array([e.state for e in enemies], dtype=np.int8)
+        self.patrol_timer = np.array([e.patrol_timer for e in enemies], dtype=float)
+        self.wait_timer = np.array([e.wait_timer for e in enemies], dtype=float)
+        self.clip = np.array([e.clip for e in enemies], dtype=np.int8)
+        self.frame = np.array([e.current_frame_index for e in enemies], dtype=np.int32)
+        self.animation_timer = np.array([e.animation_timer for e in enemies], dtype=float)
+        self.deaggro_time = Enemy.DEAGGRO_TIME
+        # The Enemy clip table, indexed by the same clip ids.
+        self.clip_frames = np.array([len(clip.frames) for clip in Enemy.CLIPS], dtype=np.int32)
+        self.clip_speed = np.array([clip.speed for clip in Enemy.CLIPS], dtype=float)
+        self.clip_loop = np.array([clip.loop for clip in Enemy.CLIPS], dtype=bool)
+
+    def __len__(self): return len(self.x)
+
+    def _resolve_platforms(self, platforms, vertical):
+        # Platforms are applied one at a time in list order, like the scalar loop,
+        # but only for the enemies that can reach each platform this tick.
+        margin = simulation.COLLISION_QUERY_MARGIN / 2
+        near = overlaps(self.x[:, None] - margin, self.y[:, None] - margin, ENEMY_WIDTH + 2 * margin, ENEMY_HEIGHT + 2 * margin,
+                        platforms[None, :, 0], platforms[None, :, 1], platforms[None, :, 2], platforms[None, :, 3])
+        for j in np.flatnonzero(near.any(axis=0)):
+            rows = np.flatnonzero(near[:, j])
+            left, top, right, bottom = platforms[j]
+            hit = overlaps(self.x[rows], self.y[rows], ENEMY_WIDTH, ENEMY_HEIGHT, left, top, right, bottom)
+            if vertical:
+                rows = rows[hit & (self.vy[rows] >= 0)]
+                self.y[rows] = top - ENEMY_HEIGHT
+                self.vy[rows] = 0
+                self.on_ground[rows] = True
+            else:
+                rows = rows[hit]
+                vx = self.vx[rows]
+                self.x[rows] = np.where(vx > 0, left - ENEMY_WIDTH, np.where(vx < 0, right, self.x[rows]))
+
+    def update(self, dt, player, platforms):
+        n = len(self)
+        if n == 0: return
+        self.cooldown_timer = np.where(self.cooldown_timer > 0, self.cooldown_timer - dt, self.cooldown_timer)
+        finished_attack = (self.state == STATE_ATTACKING) & (self.frame == self.clip_frames[self.clip] - 1)
+        self.state[finished_attack] = STATE_PATROLLING
+
+        self.vy = np.minimum(self.vy + simulation.GRAVITY, simulation.MAX_FALL_SPEED)
+        self.y = to_rect_coord(self.y + self.vy)
+        self.on_ground[:] = False
+        self._resolve_platforms(platforms, vertical=True)
+
+        prect = player.rect
+        dx = (self.x + ENEMY_WIDTH // 2) - prect.centerx
+        dy = (self.y + ENEMY_HEIGHT // 2) - prect.centery
+        in_sight = (dx * dx + dy * dy < simulation.ENEMY_SIGHT_RANGE ** 2) & (np.abs(self.y - prect.y) < 50)
+
+        self.deaggro_timer = np.where(self.is_aggro & in_sight, self.deaggro_time,
+                                      np.where(self.is_aggro, self.deaggro_timer - dt, self.deaggro_timer))
+        self.is_aggro &= ~(~in_sight & (self.deaggro_timer <= 0))
+        is_pursuing = in_sight | self.is_aggro
+
+        touching = overlaps(self.x, self.y, ENEMY_WIDTH, ENEMY_HEIGHT, prect.left, prect.top, prect.right, prect.bottom)
+        strikes = touching & (self.cooldown_timer <= 0)
+        if strikes.any():
+            self.state[strikes] = STATE_ATTACKING
+            self.cooldown_timer[strikes] = simulation.ENEMY_ATTACK_COOLDOWN
+            for _ in range(int(strikes.sum())): player.take_damage(1)
+
+        attacking = self.state == STATE_ATTACKING
+        pursuing = ~attacking & is_pursuing
+        patrolling = ~attacking & ~is_pursuing & (self.state == STATE_PATROLLING)
+        waiting = ~attacking & ~is_pursuing & (self.state == STATE_WAITING)
+
+        self.state[pursuing] = STATE_PATROLLING
+        chase_right = (self.x + ENEMY_WIDTH // 2) < prect.centerx
+        self.facing_right = np.where(pursuing, chase_right, self.facing_right)
+        walk_vx = np.where(self.facing_right, simulation.ENEMY_WALK_SPEED, -simulation.ENEMY_WALK_SPEED)
+        run_vx = np.where(self.facing_right, simulation.ENEMY_RUN_SPEED, -simulation.ENEMY_RUN_SPEED)
+        target_vx = np.where(pursuing, run_vx, np.where(patrolling, walk_vx, 0.0))
+        facing = self.facing_right.astype(np.int8)
+        new_clip = np.select([attacking, pursuing, patrolling, waiting],
+                            [CLIP_ATTACK + facing, CLIP_RUN + facing, CLIP_WALK + facing, CLIP_IDLE + facing], self.clip)
+
+        self.patrol_timer[patrolling] -= dt
+        for i in np.flatnonzero(patrolling & (self.patrol_timer <= 0)):
+            self.state[i], self.wait_timer[i] = STATE_WAITING, self.rng.uniform(2.0, 4.0)
+        self.wait_timer[waiting] -= dt
+        for i in np.flatnonzero(waiting & (self.wait_timer <= 0)):
+            self.state[i], self.patrol_timer[i] = STATE_PATROLLING, self.rng.uniform(3.0, 6.0)
+
+        moving = target_vx != 0
+        probe_x = np.where(target_vx > 0, self.x + ENEMY_WIDTH + simulation.ENEMY_EDGE_DETECTION_OFFSET,
+                           self.x - simulation.ENEMY_EDGE_DETECTION_OFFSET)
+        probe_y = self.y + ENEMY_HEIGHT + 5
+        ground_ahead = np.zeros(n, dtype=bool)
+        rows = np.flatnonzero(moving & self.on_ground)
+        if len(rows):
+            ground_ahead[rows] = overlaps(probe_x[rows, None], probe_y[rows, None], 1, 1,
+                                          platforms[None, :, 0], platforms[None, :, 1],
+                                          platforms[None, :, 2], platforms[None, :, 3]).any(axis=1)
+        should_reverse = moving & ~ground_ahead & self.on_ground
+        guarding = ~is_pursuing & (self.state != STATE_ATTACKING)
+        out_of_bounds = ((target_vx > 0) & (self.x + ENEMY_WIDTH >= self.patrol_end_x)) | \
+                        ((target_vx < 0) & (self.x <= self.patrol_start_x))
+        should_reverse |= guarding & out_of_bounds
+        self.facing_right ^= should_reverse & (self.state == STATE_PATROLLING)
+
+        self.vx = target_vx
+        self.x = to_rect_coord(self.x + self.vx)
+        self._resolve_platforms(platforms, vertical=False)
+
+        changed = new_clip != self.clip
+        self.clip = new_clip
+        self.frame[changed] = 0
+        self.animation_timer[changed] = 0
+        self.animation_timer += dt
+        advance = self.animation_timer >= self.clip_speed[self.clip]
+        self.animation_timer[advance] = 0
+        clips, following = self.clip[advance], self.frame[advance] + 1
+        count = self.clip_frames[clips]
+        self.frame[advance] = np.where(self.clip_loop[clips], following % count, np.minimum(following, count - 1))
+
+    def hit(self, hits):
+        alive = self.health > 0
+        struck = (hits > 0) & alive
+        self.health = np.where(alive, np.maximum(self.health - hits, 0), self.health)
+        self.is_aggro |= struck
+        self.deaggro_timer[struck] = self.deaggro_time
+        return struck & (self.health <= 0)
+
+    def remove(self, mask):
+        keep = ~mask
+        for name in ('x', 'y', 'vx', 'vy', 'cooldown_timer', 'patrol_start_x', 'patrol_end_x', 'facing_right', 'on_ground',
+                     'health', 'is_aggro', 'deaggro_timer', 'state', 'patrol_timer', 'wait_timer', 'clip', 'frame',
+                     'animation_timer'):
+            setattr(self, name, getattr(self, name)[keep])
+        removed = [view for view, kept in zip(self.views, keep) if not kept]
+        self.views = [view for view, kept in zip(self.views, keep) if kept]
+        return removed
+
+    def sync_views(self):
+        for i, enemy in enumerate(self.views):
+            enemy.rect.x, enemy.rect.y = int(self.x[i]), int(self.y[i])
+            enemy.vx, enemy.vy = float(self.vx[i]), float(self.vy[i])
+            enemy.facing_right = bool(self.facing_right[i])
+            enemy.on_ground = bool(self.on_ground[i])
+            enemy.health = int(self.health[i])
+            enemy.is_aggro = bool(self.is_aggro[i])
+            enemy.state = int(self.state[i])
+            enemy.clip = int(self.clip[i])
+            enemy.current_frame_index = int(self.frame[i])
+            # Written back in full so a new batch built from the views (after streaming) loses nothing.
+            enemy.cooldown_timer = float(self.cooldown_timer[i])
+            enemy.deaggro_timer = float(self.deaggro_timer[i])
+            enemy.patrol_timer, enemy.wait_timer = float(self.patrol_timer[i]), float(self.wait_timer[i])
+            enemy.animation_timer = float(self.animation_timer[i])
+
+# --- Projectile Batch ---
+class ProjectileBatch:
+    def __init__(self):
+        require_numpy()
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.direction = np.zeros(0)
+
+    def __len__(self): return len(self.x)
+
+    def add(self, projectile):
+        self.x = np.append(self.x, projectile.rect.x)
+        self.y = np.append(self.y, projectile.rect.y)
+        self.direction = np.append(self.direction, projectile.direction)
+
+    def update(self, enemies, left=0):
+        self.x += simulation.PROJECTILE_SPEED * self.direction
+        remove = ~((left < self.x) & (self.x < left + simulation.WIDTH))
+        hits = np.zeros(len(enemies), dtype=np.int32)
+        if len(self) and len(enemies):
+            matrix = overlaps(self.x[:, None], self.y[:, None], PROJECTILE_SIZE, PROJECTILE_SIZE,
+                              enemies.x[None, :], enemies.y[None, :],
+                              enemies.x[None, :] + ENEMY_WIDTH, enemies.y[None, :] + ENEMY_HEIGHT)
+            remove |= matrix.any(axis=1)
+            hits = matrix.sum(axis=0).astype(np.int32)
+        keep = ~remove
+        self.x, self.y, self.direction = self.x[keep], self.y[keep], self.direction[keep]
+        return hits
+
+    def sync_views(self, pool):
+        pool.clear()
+        for x, y, direction in zip(self.x, self.y, self.direction):
+            pool.acquire(int(x) + 5, int(y) + 5, direction > 0)
+
+def platform_array(platforms):
+    require_numpy()
+    return np.array([(p.rect.left, p.rect.top, p.rect.right, p.rect.bottom) for p in platforms], dtype=float).reshape(-1, 4)
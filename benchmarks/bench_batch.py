@@ -0,0 +1,51 @@
+import argparse
+import random
+import sys
+import time
+from pygame import Rect
+from bench_spatial import build_world
+from simulation import NO_INPUTS, FIXED_DT
+from batch import np, require_numpy, to_rect_coord
+
+def run(enemy_count, projectile_count, ticks, batch):
+    rng = random.Random(1)
+    world = build_world(40, enemy_count, rng)
+    world.index_platforms()
+    for enemy in world.enemies: enemy.health = 10 ** 9
+    if batch: world.start_batch()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if tick % 10 == 0:
+            for _ in range(projectile_count // 10):
+                world.player.attack_cooldown = 0
+                world.player.rect.center = (rng.randrange(40, 760), rng.randrange(100, 480))
+                world.tick(NO_INPUTS._replace(shoot=True), FIXED_DT)
+        world.tick(NO_INPUTS, FIXED_DT)
+        world.events.clear()
+    return (time.perf_counter() - start) / ticks * 1000
+
+def rounding_mismatches():
+    # Positions must round like pygame.Rect or the two modes drift apart, e.g. left of x=0.
+    values = [i / 4 for i in range(-40, 41)]
+    rect = Rect(0, 0, 1, 1)
+    expected = []
+    for value in values:
+        rect.x = value
+        expected.append(rect.x)
+    return [(v, e, int(r)) for v, e, r in zip(values, expected, to_rect_coord(np.array(values))) if e != r]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o update por objeto com o modo em lote (numpy).")
+    parser.add_argument('--ticks', type=int, default=60)
+    args = parser.parse_args()
+    require_numpy()
+    mismatches = rounding_mismatches()
+    if mismatches: sys.exit(f"Arredondamento diferente do pygame.Rect (valor, Rect, lote): {mismatches}")
+    print(f"{'inimigos':>8} {'projeteis':>9} {'objetos ms':>10} {'lote ms':>8} {'ganho':>6}")
+    for enemies, projectiles in [(10, 10), (100, 50), (1000, 200), (3000, 500)]:
+        scalar = run(enemies, projectiles, args.ticks, False)
+        vectorized = run(enemies, projectiles, args.ticks, True)
+        print(f"{enemies:>8} {projectiles:>9} {scalar:>10.2f} {vectorized:>8.2f} {scalar / vectorized:>5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import random
+import sys
+import time
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation import World, Platform, NO_INPUTS, FIXED_DT, WIDTH
+
+# Brute-force index with the same API as SpatialHash, used as the baseline.
+class ListIndex:
+    def __init__(self): self.items = []
+    def rebuild(self, objs): self.items = list(objs)
+    def query(self, rect, margin=0): return self.items
+
+def build_world(platform_count, enemy_count, rng):
+    world = World(seed=1)
+    columns = max(1, platform_count // 4)
+    world.platforms = [Platform(0, 500, WIDTH, 50)]
+    for i in range(platform_count - 1):
+        world.platforms.append(Platform((i % columns) * 220, 120 + (i // columns) * 90, 180, 20))
+    world.enemies.clear()
+    for i in range(enemy_count):
+        p = world.platforms[rng.randrange(len(world.platforms))]
+        x = p.rect.left + rng.randrange(max(1, p.rect.width - 40))
+        world.enemies.acquire(x, p.rect.top - 60, p.rect.left, p.rect.right, world.rng)
+    world.player.health = 10 ** 9
+    return world
+
+def run(platform_count, enemy_count, projectile_count, ticks, use_hash):
+    rng = random.Random(1)
+    world = build_world(platform_count, enemy_count, rng)
+    if not use_hash: world.platform_index, world.enemy_index = ListIndex(), ListIndex()
+    world.index_platforms()
+    for enemy in world.enemies: enemy.health = 10 ** 9
+    start = time.perf_counter()
+    for _ in range(ticks):
+        while len(world.projectiles) < projectile_count:
+            world.projectiles.acquire(rng.randrange(20, WIDTH - 20), rng.randrange(100, 500), rng.random() < 0.5)
+        world.tick(NO_INPUTS, FIXED_DT)
+        world.events.clear()
+    return (time.perf_counter() - start) / ticks * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o custo por tick com e sem o spatial hash.")
+    parser.add_argument('--ticks', type=int, default=60)
+    args = parser.parse_args()
+    scenarios = [(10, 10, 10), (100, 50, 50), (400, 100, 100), (1000, 200, 200), (1000, 500, 500)]
+    print(f"{'plataformas':>11} {'inimigos':>8} {'projeteis':>9} {'lista ms':>9} {'hash ms':>9} {'ganho':>6}")
+    for platforms, enemies, projectiles in scenarios:
+        linear = run(platforms, enemies, projectiles, args.ticks, False)
+        hashed = run(platforms, enemies, projectiles, args.ticks, True)
+        print(f"{platforms:>11} {enemies:>8} {projectiles:>9} {linear:>9.2f} {hashed:>9.2f} {linear / hashed:>5.1f}x")
+
+if __name__ == '__main__':
+    main()
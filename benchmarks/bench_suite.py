@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import types
+from collections import namedtuple
+try:
+    import resource
+except ImportError:
+    resource = None
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pygame
+from simulation import World, FIXED_DT, COIN_FRAME_COUNT
+from level import generate_level, encode_level, decode_level
+
+# --- Game Harness ---
+# Jogo.py is loaded as a Pygame Zero module without entering pgzero's main
+# loop, so the benchmark drives the game's own setup_level(), update(dt) and
+# draw() one frame at a time on a hidden display.
+def load_game(argv=()):
+    sys._pgzrun = True
+    from pgzero.runner import prepare_mod
+    from pgzero.game import PGZeroGame
+    path = os.path.join(ROOT, 'Jogo.py')
+    game = types.ModuleType('Jogo')
+    game.__file__ = path
+    prepare_mod(game)
+    sys.argv = [path, *argv]
+    with open(path, encoding='utf-8') as f: exec(compile(f.read(), path, 'exec'), game.__dict__)
+    PGZeroGame(game).reinit_screen()
+    game.audio.set_enabled(False)
+    while game.current_game_state == game.GAME_STATE_LOADING:
+        game.update(0)
+        time.sleep(0.005)
+    return game
+
+def start_level(game):
+    random.seed(0)
+    game.setup_level()
+    game.current_game_state = game.GAME_STATE_PLAYING
+
+# --- Scenarios ---
+Scenario = namedtuple('Scenario', ['argv', 'setup', 'per_frame', 'frames'])
+
+def immortal(game):
+    game.world.player.health = 10 ** 9
+
+def spawn_enemies(world, count, rng):
+    for _ in range(count):
+        p = world.platforms[rng.randrange(len(world.platforms))]
+        x = p.rect.left + rng.randrange(max(1, p.rect.width - 40))
+        world.enemies.acquire(x, p.rect.top - 60, p.rect.left, p.rect.right, world.rng).health = 10 ** 9
+
+def patrolling_enemies(count):
+    def setup(game):
+        immortal(game)
+        game.world.enemies.clear()
+        spawn_enemies(game.world, count, random.Random(1))
+    return setup
+
+def projectiles_in_flight(count):
+    rng = random.Random(1)
+    def per_frame(game):
+        world = game.world
+        while len(world.projectiles) < count:
+            world.projectiles.acquire(rng.randrange(20, 780), rng.randrange(100, 480), rng.random() < 0.5)
+    return per_frame
+
+def distant_patrols(count):
+    # A six-screen level with enemies spread over every active chunk, most of them off screen.
+    def setup(game):
+        game.world = World(seed=1, level=decode_level(encode_level(generate_level(6, 3))))
+        game.world.bus = game.event_bus
+        patrolling_enemies(count)(game)
+    return setup
+
+def many_platforms(count):
+    def setup(game):
+        from simulation import Platform
+        world = game.world
+        immortal(game)
+        columns = 25
+        world.platforms = [Platform(0, 500, 800, 50)]
+        world.platforms += [Platform((i % columns) * 32, 60 + (i // columns) * 11, 28, 6) for i in range(count - 1)]
+        world.index_platforms()
+        world.enemies.clear()
+        spawn_enemies(world, 50, random.Random(1))
+    return setup
+
+def cold_sprites(game):
+    immortal(game)
+    game.sprite_cache.clear()
+
+def long_level(game):
+    data = generate_level(40, 1)
+    data['platforms'] = [[0, 500, data['width'], 50]] + [p for p in data['platforms'] if p[1] != 500]
+    game.world = World(seed=1, level=decode_level(encode_level(data)))
+    game.world.bus = game.event_bus
+    immortal(game)
+    game.keyboard._press(pygame.K_RIGHT)
+
+SCENARIOS = {
+    'nivel_padrao': Scenario((), immortal, None, 600),
+    'inimigos_500': Scenario((), patrolling_enemies(500), None, 300),
+    'projeteis_300': Scenario((), immortal, projectiles_in_flight(300), 300),
+    'inimigos_longe_500': Scenario((), distant_patrols(500), None, 300),
+    'plataformas_1000': Scenario((), many_platforms(1000), None, 300),
+    # Two full cycles of the coin animation, starting from an empty sprite cache.
+    'moeda_todos_frames': Scenario((), cold_sprites, None, COIN_FRAME_COUNT * 6 * 2),
+    'dirty_rects': Scenario(('--dirty-rects',), patrolling_enemies(50), None, 600),
+    'fase_longa': Scenario((), long_level, None, 600),
+}
+WARMUP_FRAMES = 30
+
+def run_scenario(name):
+    scenario = SCENARIOS[name]
+    game = load_game(scenario.argv)
+    start_level(game)
+    scenario.setup(game)
+    blocks = sys.getallocatedblocks
+    update_times, draw_times, net_blocks = [], [], 0
+    start_ticks = None
+    for frame in range(WARMUP_FRAMES + scenario.frames):
+        if frame == WARMUP_FRAMES: start_ticks = game.world.tick_count
+        if scenario.per_frame: scenario.per_frame(game)
+        start_blocks = blocks()
+        start = time.perf_counter()
+        game.update(FIXED_DT)
+        updated = time.perf_counter()
+        end_blocks = blocks()
+        game.draw()
+        drawn = time.perf_counter()
+        pygame.display.flip()
+        if frame >= WARMUP_FRAMES:
+            update_times.append(updated - start)
+            draw_times.append(drawn - updated)
+            net_blocks += end_blocks - start_blocks
+    ticks = game.world.tick_count - start_ticks
+    draw_ms = sorted(t * 1000 for t in draw_times)
+    return {
+        'frames': scenario.frames,
+        'ticks': ticks,
+        'ticks_per_sec': ticks / sum(update_times) if ticks else 0.0,
+        'update_ms': sum(update_times) * 1000 / len(update_times),
+        'draw_ms': sum(draw_ms) / len(draw_ms),
+        'draw_ms_p95': draw_ms[int(0.95 * len(draw_ms))],
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        'net_blocks_per_tick': net_blocks / ticks if ticks else 0.0,
+        'still_playing': game.current_game_state == game.GAME_STATE_PLAYING,
+    }
+
+def run_isolated(name):
+    # Each run gets a fresh process so peak RSS and caches belong to that scenario alone.
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-scenario', name],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def median(values):
+    if any(not isinstance(v, (int, float)) or isinstance(v, bool) for v in values): return values[-1]
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+# --- Comparison ---
+# metric -> True when bigger is better
+METRICS = {'ticks_per_sec': True, 'update_ms': False, 'draw_ms': False, 'peak_rss_kb': False, 'net_blocks_per_tick': False}
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous: continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None: continue
+            if metric == 'net_blocks_per_tick':
+                # Blocks allocated minus freed: only growth (memory kept every tick) counts,
+                # a negative value is just warm-up state being freed.
+                old, new = max(old, 0.0), max(new, 0.0)
+            change = (new - old) / max(abs(old), 1.0 if metric == 'net_blocks_per_tick' else 1e-9)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, old, new, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede simulação e desenho do jogo em cenários de estresse, sem janela.")
+    parser.add_argument('scenarios', nargs='*', help=f"cenários a rodar (padrão: todos): {', '.join(SCENARIOS)}")
+    parser.add_argument('--out', metavar='ARQUIVO', default='bench_results.json')
+    parser.add_argument('--baseline', metavar='ARQUIVO', help="compara com um resultado salvo e aponta regressões")
+    parser.add_argument('--threshold', type=float, default=0.10, help="piora relativa que conta como regressão (padrão 0.10)")
+    parser.add_argument('--repeat', type=int, default=3, help="execuções por cenário; guarda a mediana de cada medida")
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario)))
+        return
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown: parser.error(f"cenário desconhecido: {', '.join(unknown)}")
+    results = {'python': platform.python_version(), 'platform': platform.platform(), 'scenarios': {}}
+    print(f"{'cenário':<20} {'ticks/s':>9} {'update ms':>9} {'draw ms':>8} {'p95':>6} {'RSS MB':>7} {'blocos/tick':>11}")
+    for name in names:
+        runs = [run_isolated(name) for _ in range(args.repeat)]
+        result = results['scenarios'][name] = {key: median([run[key] for run in runs]) for key in runs[0]}
+        rss = f"{result['peak_rss_kb'] / 1024:7.1f}" if result['peak_rss_kb'] else f"{'-':>7}"
+        note = '' if result['still_playing'] else '  (partida terminou antes do fim)'
+        print(f"{name:<20} {result['ticks_per_sec']:>9.0f} {result['update_ms']:>9.3f} {result['draw_ms']:>8.3f} "
+              f"{result['draw_ms_p95']:>6.2f} {rss} {result['net_blocks_per_tick']:>11.1f}{note}")
+    with open(args.out, 'w') as f: json.dump(results, f, indent=2)
+    print(f"Resultados salvos em {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f"REGRESSÃO {name} {metric}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+        if not regressions: print(f"Nenhuma regressão acima de {args.threshold:.0%} em relação a {args.baseline}")
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
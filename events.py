@@ -0,0 +1,27 @@
+from collections import Counter
+
+# --- Event Bus ---
+# The world publishes the gameplay events of each tick ('player_hit', 'jump',
+# 'shoot', 'coin', 'enemy_defeated') as one batch. Audio, analytics and
+# anything else that reacts to gameplay subscribes here instead of being
+# called from the simulation.
+class EventBus:
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, handler):
+        self.subscribers.append(handler)
+        return handler
+
+    def unsubscribe(self, handler):
+        self.subscribers.remove(handler)
+
+    def publish(self, events):
+        for handler in self.subscribers: handler(events)
+
+class EventCounter:
+    def __init__(self):
+        self.totals = Counter()
+
+    def __call__(self, events):
+        self.totals.update(events)
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+import time
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from pygame import Rect
+import simulation
+from simulation import World, Inputs, NO_INPUTS, FIXED_DT, WORLD_PLAYING
+from events import EventBus, EventCounter
+from level import load_level
+from profiler import Profiler
+from replay import Recorder, STATUS_NAMES
+
+# --- Input Policies ---
+def idle_policy(world):
+    return NO_INPUTS
+
+def make_random_policy(rng):
+    def policy(world):
+        direction = rng.random()
+        return Inputs(direction < 0.4, direction > 0.6, rng.random() < 0.3, rng.random() < 0.05, rng.random() < 0.1)
+    return policy
+
+CLIMB_HEIGHT = 110  # highest platform top above the feet that one jump reaches
+
+def next_foothold(world, target):
+    # The platform to climb onto on the way up to target: the highest one a
+    # jump reaches that is not above the target, nearest to it on a tie.
+    rect = world.player.rect
+    if target.bottom >= rect.bottom - 20: return None
+    reachable = [p.rect for p in world.platforms
+                 if rect.bottom - CLIMB_HEIGHT <= p.rect.top < rect.bottom - 20 and p.rect.top > target.top]
+    return min(reachable, key=lambda p: (p.top, abs(p.centerx - target.centerx)), default=None)
+
+def make_scripted_policy(rng):
+    # Walks to the nearest enemy and shoots once it is level and in front;
+    # after enough enemies are down it goes for the coin instead. Anything
+    # higher up is reached one platform at a time, jumping from beside it,
+    # since a jump from underneath is pushed back by the platform. The
+    # platform is picked on the ground and kept until the hero lands.
+    climbing_world = foothold = None
+
+    def policy(world):
+        nonlocal climbing_world, foothold
+        player = world.player
+        rect = player.rect
+        if world.enemies and world.enemies_defeated < world.level.goal:
+            target = min(world.enemies, key=lambda e: abs(e.rect.centerx - rect.centerx)).rect
+        else:
+            target = world.coin.rect
+        dx = target.centerx - rect.centerx
+        level = abs(target.bottom - rect.bottom) < 20
+        facing_target = (dx >= 0) == player.facing_right
+        if target is not world.coin.rect and level and abs(dx) < 300:
+            # Only turn to face the enemy, then stand and shoot.
+            return Inputs(dx < 0 and not facing_target, dx >= 0 and not facing_target, False, False, facing_target)
+        if player.on_ground or climbing_world is not world:
+            climbing_world, foothold = world, next_foothold(world, target)
+        if foothold is not None:
+            from_left = rect.centerx < foothold.centerx
+            spot = foothold.left - 30 if from_left else foothold.right + 30
+            support = next((p.rect for p in world.platforms if p.rect.top == rect.bottom
+                            and p.rect.left < rect.right and rect.left < p.rect.right), None)
+            if support: spot = max(support.left + 10, min(support.right - 10, spot))
+            if player.on_ground and abs(spot - rect.centerx) > 5:
+                return Inputs(spot < rect.centerx, spot > rect.centerx, abs(spot - rect.centerx) > 200, False, False)
+            return Inputs(not from_left, from_left, False, player.on_ground, False)
+        probe = Rect(rect.right + 20 if dx > 0 else rect.left - 20, rect.bottom + 5, 1, world.level.height)
+        gap_ahead = not any(probe.colliderect(p.rect) for p in world.platform_index.query(probe))
+        return Inputs(dx < -10, dx > 10, abs(dx) > 200 or gap_ahead, gap_ahead, False)
+    return policy
+
+POLICIES = {'random': make_random_policy, 'idle': lambda rng: idle_policy, 'scripted': make_scripted_policy}
+
+# --- Runner ---
+def run_match(policy, max_seconds=120.0, batch=False, seed=None, record_path=None, profiler=None, level=None, bus=None):
+    world = World(seed=seed, batch=batch, level=level)
+    world.bus = bus
+    recorder = Recorder(world) if record_path else None
+    max_ticks = int(max_seconds / FIXED_DT)
+    while world.status == WORLD_PLAYING and world.tick_count < max_ticks:
+        # Policies read the Enemy objects, which batch mode only refreshes on sync_views().
+        if world.batch: world.sync_views()
+        world.step(policy(world), FIXED_DT)
+        world.events.clear()
+        if profiler: profiler.end_frame()
+    if recorder: recorder.save(record_path)
+    return {
+        'result': STATUS_NAMES[world.status],
+        'ticks': world.tick_count,
+        'score': world.score,
+        'health': world.player.health,
+        'enemies_defeated': world.enemies_defeated,
+        'damage_taken': world.player.max_health - world.player.health,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Roda partidas sem janela do pgzero.")
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--max-seconds', type=float, default=120.0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', action='store_true', help="usa o modo em lote com numpy")
+    parser.add_argument('--level', metavar='ARQUIVO', help="joga esta fase em vez da fase padrão")
+    parser.add_argument('--record', metavar='PASTA', help="grava o replay de cada partida nesta pasta")
+    parser.add_argument('--profile', metavar='ARQUIVO', help="mede cada seção da simulação e exporta (.csv ou .json)")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(window=10000)
+        profiler.instrument(simulation.World, 'tick', 'World.tick')
+        profiler.instrument(simulation.Player, 'update', 'Player.update')
+        profiler.instrument(simulation.Enemy, 'update', 'Enemy.update')
+        profiler.instrument(simulation.Enemy, 'fast_forward', 'Enemy.fast_forward')
+        profiler.instrument(simulation.World, 'update_projectiles', 'World.update_projectiles')
+
+    rng = random.Random(args.seed)
+    level = load_level(args.level) if args.level else None
+    bus = EventBus()
+    event_counter = bus.subscribe(EventCounter())
+    if args.record: os.makedirs(args.record, exist_ok=True)
+    policy = POLICIES[args.policy](rng)
+    totals = {name: 0 for name in STATUS_NAMES.values()}
+    start = time.perf_counter()
+    for i in range(args.matches):
+        record_path = os.path.join(args.record, f"partida_{args.seed + i}.rep") if args.record else None
+        totals[run_match(policy, args.max_seconds, args.batch, args.seed + i, record_path, profiler, level, bus)['result']] += 1
+    elapsed = time.perf_counter() - start
+    print(f"{args.matches} partidas em {elapsed:.2f}s ({args.matches / elapsed * 60:.0f} partidas/min)")
+    for name, count in totals.items(): print(f"  {name}: {count}")
+    print("Eventos: " + ", ".join(f"{name} {count}" for name, count in sorted(event_counter.totals.items())))
+    if profiler:
+        for line in profiler.report_lines()[1:]: print(line)
+        profiler.export(args.profile)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+import pygame
+from pgzero import ptext
+from pgzero.screen import Screen
+
+# --- Retained HUD Layers ---
+# A layer keeps the last surface it rendered together with the key (score,
+# health, music_on...) it was rendered from, and only redraws when the key
+# changes. Renderers draw through a pgzero Screen, so they use the same
+# screen.draw API as the rest of the game.
+class CachedLayer:
+    def __init__(self, render):
+        self.render = render
+        self.key = None
+        self.surface = None
+        self.render_count = 0
+
+    def get(self, key=None):
+        if self.surface is None or key != self.key:
+            self.surface = self.render(key)
+            self.key = key
+            self.render_count += 1
+        return self.surface
+
+    def invalidate(self):
+        self.surface = None
+
+def new_layer(size, transparent=False):
+    if transparent: return Screen(pygame.Surface(size, pygame.SRCALPHA))
+    return Screen(pygame.Surface(size))
+
+def text_surface(text, **kwargs):
+    return ptext.getsurf(text, cache=False, **kwargs)
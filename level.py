@@ -0,0 +1,186 @@
+import argparse
+import functools
+import json
+import random
+import zlib
+from collections import namedtuple
+
+# --- Level Format ---
+# Line 1 is a JSON header: level size, player start, coin, enemy goal and the
+# (offset, length) of every chunk relative to the end of the header line.
+# Each following line is one chunk of CHUNK_WIDTH pixels with two layers:
+#   "tiles":    solid rectangles [x, y, width, height] overlapping the chunk
+#   "entities": ["enemy", id, x, y, patrol_start_x, patrol_end_x]
+# A platform wider than a chunk is listed in every chunk it touches, so a
+# chunk can be read on its own with a single seek.
+LEVEL_FORMAT = 'FXSL'
+LEVEL_VERSION = 1
+CHUNK_WIDTH = 800
+
+PlatformSpec = namedtuple('PlatformSpec', ['x', 'y', 'width', 'height'])
+EnemySpec = namedtuple('EnemySpec', ['id', 'x', 'y', 'patrol_start_x', 'patrol_end_x'])
+Chunk = namedtuple('Chunk', ['index', 'platforms', 'enemies'])
+
+# The original single-screen level.
+DEFAULT_LEVEL = {
+    'width': 800, 'height': 600, 'player': [100, 400], 'coin': [650, 234], 'goal': 2,
+    'platforms': [[0, 500, 800, 50], [150, 400, 200, 30], [450, 350, 150, 30], [600, 250, 100, 30]],
+    'enemies': [[160, 340, 150, 350], [460, 290, 450, 600]],
+}
+
+class Level:
+    def __init__(self, header, read_chunk):
+        if header.get('format') != LEVEL_FORMAT or header.get('version') != LEVEL_VERSION:
+            raise ValueError("Arquivo de fase inválido ou de outra versão.")
+        self.width = header['width']
+        self.height = header['height']
+        self.chunk_width = header['chunk_width']
+        self.player_start = tuple(header['player'])
+        self.coin = tuple(header['coin'])
+        self.goal = header['goal']
+        self.chunks = header['chunks']
+        self._read_chunk = read_chunk
+
+    @property
+    def chunk_count(self): return len(self.chunks)
+
+    def chunk_range(self, left, right):
+        return range(max(0, int(left // self.chunk_width)), min(self.chunk_count, int(right // self.chunk_width) + 1))
+
+    def read_chunk(self, index):
+        offset, length = self.chunks[index]
+        layers = json.loads(self._read_chunk(offset, length))
+        platforms = [PlatformSpec(*tile) for tile in layers['tiles']]
+        enemies = [EnemySpec(*entity[1:]) for entity in layers['entities'] if entity[0] == 'enemy']
+        return Chunk(index, platforms, enemies)
+
+def encode_level(data, chunk_width=CHUNK_WIDTH):
+    count = max(1, -(-data['width'] // chunk_width))
+    chunks = [{'tiles': [], 'entities': []} for _ in range(count)]
+    for x, y, width, height in data['platforms']:
+        for index in range(max(0, x // chunk_width), min(count, (x + width - 1) // chunk_width + 1)):
+            chunks[index]['tiles'].append([x, y, width, height])
+    for spawn_id, (x, y, start, end) in enumerate(data['enemies']):
+        chunks[min(count - 1, max(0, x // chunk_width))]['entities'].append(['enemy', spawn_id, x, y, start, end])
+    body = bytearray()
+    offsets = []
+    for chunk in chunks:
+        line = json.dumps(chunk, separators=(',', ':')).encode() + b'\n'
+        offsets.append([len(body), len(line)])
+        body += line
+    header = {'format': LEVEL_FORMAT, 'version': LEVEL_VERSION, 'width': data['width'], 'height': data['height'],
+              'chunk_width': chunk_width, 'player': data['player'], 'coin': data['coin'], 'goal': data['goal'],
+              'chunks': offsets}
+    return json.dumps(header, separators=(',', ':')).encode() + b'\n' + bytes(body)
+
+def decode_level(data):
+    split = data.index(b'\n') + 1
+    return Level(json.loads(data[:split]), lambda offset, length: data[split + offset:split + offset + length])
+
+def load_level(path):
+    # Only the header is read here; chunks are read from disk when the world asks for them.
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+    body_start = len(header_line)
+
+    def read_chunk(offset, length):
+        with open(path, 'rb') as f:
+            f.seek(body_start + offset)
+            return f.read(length)
+    return Level(json.loads(header_line), read_chunk)
+
+def save_level(data, path):
+    with open(path, 'wb') as f: f.write(encode_level(data))
+
+def default_level():
+    return decode_level(encode_level(DEFAULT_LEVEL))
+
+@functools.lru_cache(maxsize=8)
+def level_id(level):
+    # CRC of the header, stored by replays and saves to refuse the wrong level.
+    return zlib.crc32(json.dumps([level.width, level.height, level.chunk_width, level.player_start, level.coin,
+                                  level.goal, level.chunks]).encode())
+
+# --- Generator ---
+# The hero jumps about 140px high and 290px far at a run, and a platform hit
+# from below pushes him back to its left side instead of stopping the jump.
+# So only STEP_TOP can be reached from the floor, higher platforms
+# need a step there, and nothing may float over the arc of a jump across a gap.
+GROUND_TOP = 500
+STEP_TOP = 400
+STEP_WIDTH = 100
+STEP_OVERHANG = 80  # part of a step left of its platform, to jump up from
+MAX_GAP = 120
+GAP_CLEARANCE = (200, 200)  # free air before and after a ground gap, room to drop off a platform
+
+def generate_level(screens, seed=0, screen_width=800, height=600):
+    rng = random.Random(seed)
+    width = screens * screen_width
+    platforms, enemies, gaps = [], [], []
+    x = 0
+    while x < width:
+        segment = min(width - x, rng.randrange(500, 1300)) if x else min(width, 600)
+        platforms.append([x, GROUND_TOP, segment, 50])
+        if x and segment >= 300: enemies.append([x + segment // 2, 440, x, x + segment])
+        ground_end = x + segment
+        x = ground_end + rng.randrange(60, MAX_GAP)
+        if x < width: gaps.append((ground_end, x))
+        else: platforms[-1][2] = width - platforms[-1][0]
+    floor_end = len(platforms)
+    for left in range(screen_width // 2, width - 200, 250):
+        top = rng.choice((STEP_TOP, 350, 300))
+        platform_width = rng.randrange(100, 220)
+        span_left = left - STEP_OVERHANG if top < STEP_TOP else left
+        if any(start - GAP_CLEARANCE[0] < left + platform_width and span_left < end + GAP_CLEARANCE[1] for start, end in gaps):
+            continue
+        if top < STEP_TOP:
+            previous = platforms[-1]
+            # Trim the platform before so the step does not end up under it.
+            if len(platforms) > floor_end and previous[0] + previous[2] > span_left - 20:
+                previous[2] = span_left - 20 - previous[0]
+                if enemies and enemies[-1][2] == previous[0]: enemies[-1][3] = previous[0] + previous[2]
+            platforms.append([span_left, STEP_TOP, STEP_WIDTH, 30])
+        platforms.append([left, top, platform_width, 30])
+        if left > screen_width and rng.random() < 0.3: enemies.append([left + 10, top - 60, left, left + platform_width])
+    last = platforms[-1]
+    coin = [last[0] + last[2] // 2, last[1] - 16]
+    data = {'width': width, 'height': height, 'player': [100, 400], 'coin': coin, 'goal': max(1, len(enemies) // 2),
+            'platforms': platforms, 'enemies': enemies}
+    problems = traversal_problems(data)
+    if problems: raise ValueError(f"Fase gerada não pode ser atravessada: {problems[0]}")
+    return data
+
+def traversal_problems(data):
+    # Checks the rules above: the floor has no gap wider than a jump, nothing
+    # floats over a gap and every platform above STEP_TOP has a step to its left.
+    ground = sorted(p for p in data['platforms'] if p[1] == GROUND_TOP)
+    floating = [p for p in data['platforms'] if p[1] < GROUND_TOP]
+    problems = []
+    if not ground or ground[0][0] > data['player'][0]: problems.append("sem chão no início")
+    reach = ground[0][0] + ground[0][2] if ground else 0
+    gaps = []
+    for x, y, width, height in ground[1:]:
+        if x - reach > MAX_GAP: problems.append(f"buraco de {x - reach}px em x={reach}")
+        if x > reach: gaps.append((reach, x))
+        reach = max(reach, x + width)
+    if reach < data['width']: problems.append(f"chão termina em x={reach}")
+    for x, y, width, height in floating:
+        for start, end in gaps:
+            if start - GAP_CLEARANCE[0] < x + width and x < end + GAP_CLEARANCE[1]:
+                problems.append(f"plataforma em x={x} sobre o buraco em x={start}")
+        if y < STEP_TOP and not any(s[1] == STEP_TOP and s[0] + 40 <= x <= s[0] + s[2] + 20 for s in floating):
+            problems.append(f"plataforma em x={x}, y={y} sem degrau")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera uma fase longa no formato de fases do jogo.")
+    parser.add_argument('arquivo')
+    parser.add_argument('--telas', type=int, default=40, help="largura da fase em telas")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    data = generate_level(args.telas, args.seed)
+    save_level(data, args.arquivo)
+    print(f"{args.arquivo}: {args.telas} telas, {len(data['platforms'])} plataformas, {len(data['enemies'])} inimigos")
+
+if __name__ == '__main__':
+    main()
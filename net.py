@@ -0,0 +1,406 @@
+import argparse
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from pygame import Rect
+from simulation import World, Player, Enemy, Coin, Platform, FIXED_DT, NO_CLIP, COIN_SIZE, WORLD_PLAYING
+from batch import ENEMY_WIDTH, ENEMY_HEIGHT, PROJECTILE_SIZE
+from headless import POLICIES
+from level import load_level
+from pipeline import EntityView, PlayerView, ProjectileView, Snapshot, blend
+from replay import STATUS_NAMES
+
+# --- Wire Format ---
+# A frame is one tick of world state. A keyframe holds everything; a delta
+# holds only what changed since the previous frame on the same connection,
+# so a walking samurai costs 6 bytes a tick and a still one costs nothing.
+# Positions are whole pixels, sent in full as int16 relative to the camera or
+# as an int8 step from the previous frame. Platforms (absolute, int32) are only
+# sent when the set of active platforms changes. On the socket each frame is
+# prefixed with its uint32 length.
+FRAME_KEY = 1
+FRAME_PLATFORMS = 2
+HEADER = struct.Struct('<BIBHi?B')  # flags, tick, status, score, camera_x, coin collected, coin frame
+COIN = struct.Struct('<ii')  # keyframes only; the coin never moves
+PLAYER = struct.Struct('<hhbBBhh')  # x, y, clip, frame, invincibility (ticks), health, max health
+COUNTS = struct.Struct('<HH')  # removed entities, changed entities
+KEY = struct.Struct('<HB')  # pool index, generation (mod 256)
+FLAGS = struct.Struct('<B')
+FULL_POSITION = struct.Struct('<hh')
+STEP = struct.Struct('<bb')
+ANIMATION = struct.Struct('<bB')  # clip, frame
+PLATFORM_COUNT = struct.Struct('<H')
+PLATFORM = struct.Struct('<iiii')
+LENGTH = struct.Struct('<I')
+POSITION_FULL, POSITION_STEP, ANIMATED = 1, 2, 4
+
+# What goes on the wire. enemies maps key -> (x, y, clip, frame) and
+# projectiles maps key -> (x, y).
+NetState = namedtuple('NetState', ['tick', 'status', 'score', 'camera_x', 'is_coin_collected', 'coin', 'player',
+                                   'enemies', 'projectiles', 'platforms'])
+
+class StateCapture:
+    # Keeps the platform tuple between ticks; the world replaces its platform list when it changes.
+    def __init__(self):
+        self.platform_list = None
+        self.platforms = ()
+
+    def __call__(self, world):
+        if world.platforms is not self.platform_list:
+            self.platform_list = world.platforms
+            self.platforms = tuple(tuple(p.rect) for p in world.platforms)
+        player, coin = world.player, world.coin
+        invincibility = min(255, max(0, round(player.invincibility_timer / FIXED_DT)))
+        return NetState(
+            world.tick_count, world.status, world.score, world.camera_x, world.is_coin_collected,
+            (coin.rect.x, coin.rect.y, coin.current_frame_index),
+            (player.rect.x, player.rect.y, player.clip, player.current_frame_index, invincibility,
+             player.health, player.max_health),
+            {(e.pool_index, e.generation & 0xFF): (e.rect.x, e.rect.y, e.clip, e.current_frame_index) for e in world.enemies},
+            {(p.pool_index, p.generation & 0xFF): (p.rect.x, p.rect.y) for p in world.projectiles},
+            self.platforms)
+
+# --- Encoding ---
+def encode_entities(parts, current, previous, camera_x, animated):
+    removed = [key for key in previous if key not in current]
+    records = []
+    for key, value in current.items():
+        old = previous.get(key)
+        if old == value: continue
+        x, y = value[0], value[1]
+        if old is None or not (-128 <= x - old[0] < 128 and -128 <= y - old[1] < 128):
+            flags, position = POSITION_FULL, FULL_POSITION.pack(x - camera_x, y)
+        elif (x, y) != (old[0], old[1]):
+            flags, position = POSITION_STEP, STEP.pack(x - old[0], y - old[1])
+        else:
+            flags, position = 0, b''
+        if animated and (old is None or value[2:] != old[2:]):
+            flags |= ANIMATED
+            position += ANIMATION.pack(*value[2:])
+        records.append(KEY.pack(*key) + FLAGS.pack(flags) + position)
+    parts.append(COUNTS.pack(len(removed), len(records)))
+    parts.extend(KEY.pack(*key) for key in removed)
+    parts.extend(records)
+
+def encode(state, previous=None):
+    # Without a previous state the frame is a keyframe.
+    flags = FRAME_KEY if previous is None else 0
+    if previous is None or state.platforms is not previous.platforms: flags |= FRAME_PLATFORMS
+    camera_x = state.camera_x
+    coin_x, coin_y, coin_frame = state.coin
+    parts = [HEADER.pack(flags, state.tick, state.status, state.score, camera_x, state.is_coin_collected, coin_frame)]
+    if previous is None: parts.append(COIN.pack(coin_x, coin_y))
+    x, y, *player = state.player
+    parts.append(PLAYER.pack(x - camera_x, y, *player))
+    encode_entities(parts, state.enemies, previous.enemies if previous else {}, camera_x, True)
+    encode_entities(parts, state.projectiles, previous.projectiles if previous else {}, camera_x, False)
+    if flags & FRAME_PLATFORMS:
+        parts.append(PLATFORM_COUNT.pack(len(state.platforms)))
+        parts.extend(PLATFORM.pack(*platform) for platform in state.platforms)
+    return b''.join(parts)
+
+def decode_entities(data, offset, previous, camera_x, animated):
+    removed, changed = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    entities = dict(previous)
+    for _ in range(removed):
+        del entities[KEY.unpack_from(data, offset)]
+        offset += KEY.size
+    for _ in range(changed):
+        key = KEY.unpack_from(data, offset)
+        (flags,) = FLAGS.unpack_from(data, offset + KEY.size)
+        offset += KEY.size + FLAGS.size
+        value = previous.get(key)
+        if flags & POSITION_FULL:
+            x, y = FULL_POSITION.unpack_from(data, offset)
+            x += camera_x
+            offset += FULL_POSITION.size
+        elif flags & POSITION_STEP:
+            dx, dy = STEP.unpack_from(data, offset)
+            x, y = value[0] + dx, value[1] + dy
+            offset += STEP.size
+        else:
+            x, y = value[0], value[1]
+        if not animated: entities[key] = (x, y)
+        elif flags & ANIMATED:
+            entities[key] = (x, y, *ANIMATION.unpack_from(data, offset))
+            offset += ANIMATION.size
+        else:
+            entities[key] = (x, y, *value[2:])
+    return entities, offset
+
+def decode(data, previous=None):
+    flags, tick, status, score, camera_x, is_coin_collected, coin_frame = HEADER.unpack_from(data)
+    offset = HEADER.size
+    if flags & FRAME_KEY:
+        previous = None
+        coin_x, coin_y = COIN.unpack_from(data, offset)
+        offset += COIN.size
+    else:
+        coin_x, coin_y = previous.coin[:2]
+    x, y, *player = PLAYER.unpack_from(data, offset)
+    offset += PLAYER.size
+    enemies, offset = decode_entities(data, offset, previous.enemies if previous else {}, camera_x, True)
+    projectiles, offset = decode_entities(data, offset, previous.projectiles if previous else {}, camera_x, False)
+    if flags & FRAME_PLATFORMS:
+        (count,) = PLATFORM_COUNT.unpack_from(data, offset)
+        offset += PLATFORM_COUNT.size
+        platforms = tuple(PLATFORM.iter_unpack(data[offset:offset + count * PLATFORM.size]))
+    else:
+        platforms = previous.platforms
+    return NetState(tick, status, score, camera_x, is_coin_collected, (coin_x, coin_y, coin_frame),
+                    (x + camera_x, y, *player), enemies, projectiles, platforms)
+
+def clip_frames(cls, clip):
+    return cls.CLIPS[clip].frames if clip != NO_CLIP else ()
+
+def to_snapshot(state, now, platforms):
+    # Builds the same Snapshot the render pipeline draws; heroes and samurai share one box size.
+    x, y, clip, frame, invincibility, health, max_health = state.player
+    coin_x, coin_y, coin_frame = state.coin
+    return Snapshot(
+        state.tick, now, state.status, state.score, state.camera_x, state.is_coin_collected,
+        PlayerView(Rect(x, y, ENEMY_WIDTH, ENEMY_HEIGHT), clip_frames(Player, clip), frame, Player.image_scale,
+                   invincibility * FIXED_DT, health, max_health),
+        EntityView(None, Rect(coin_x, coin_y, COIN_SIZE, COIN_SIZE), Coin.CLIPS[0].frames, coin_frame, Coin.image_scale),
+        tuple(EntityView(key, Rect(x, y, ENEMY_WIDTH, ENEMY_HEIGHT), clip_frames(Enemy, clip), frame, Enemy.image_scale)
+              for key, (x, y, clip, frame) in state.enemies.items()),
+        tuple(ProjectileView(key, Rect(x, y, PROJECTILE_SIZE, PROJECTILE_SIZE))
+              for key, (x, y) in state.projectiles.items()),
+        platforms)
+
+# --- Measurements ---
+class NetStats:
+    def __init__(self, window=100000):
+        self.frames = 0
+        self.keyframes = 0
+        self.delta_bytes = 0
+        self.keyframe_bytes = 0
+        self.encode_times = deque(maxlen=window)
+
+    def record(self, size, seconds, keyframe):
+        # Sizes include the length prefix; TCP/IP headers are not counted.
+        size += LENGTH.size
+        self.frames += 1
+        if keyframe:
+            self.keyframes += 1
+            self.keyframe_bytes += size
+        else:
+            self.delta_bytes += size
+        self.encode_times.append(seconds)
+
+    def report_lines(self):
+        if not self.frames: return ["Nenhum snapshot enviado."]
+        deltas = self.frames - self.keyframes
+        per_tick = (self.delta_bytes + self.keyframe_bytes) / self.frames
+        times = sorted(t * 1e6 for t in self.encode_times)
+        return [
+            f"{self.frames} ticks enviados ({self.keyframes} keyframes)",
+            f"  banda: {per_tick:.1f} bytes/tick = {per_tick / FIXED_DT / 1024:.2f} KB/s a {1 / FIXED_DT:.0f} ticks/s",
+            f"  delta médio: {self.delta_bytes / deltas if deltas else 0:.1f} bytes, "
+            f"keyframe médio: {self.keyframe_bytes / self.keyframes if self.keyframes else 0:.1f} bytes",
+            f"  codificação: média {sum(times) / len(times):.1f} µs, p95 {times[int(0.95 * len(times))]:.1f} µs por tick",
+        ]
+
+# --- Server ---
+class Spectator:
+    def __init__(self, connection, max_backlog):
+        self.connection = connection
+        self.max_backlog = max_backlog
+        self.frames = deque()
+        self.ready = threading.Condition()
+        self.needs_keyframe = True
+        self.alive = True
+        threading.Thread(target=self._send_loop, name='spectator', daemon=True).start()
+
+    def send(self, frame):
+        with self.ready:
+            if len(self.frames) >= self.max_backlog:
+                # Too far behind: drop what is queued and start over from a keyframe.
+                self.frames.clear()
+                self.needs_keyframe = True
+                return
+            self.frames.append(frame)
+            self.needs_keyframe = False
+            self.ready.notify()
+
+    def close(self):
+        with self.ready:
+            self.frames.append(None)
+            self.ready.notify()
+
+    def _send_loop(self):
+        try:
+            while True:
+                with self.ready:
+                    while not self.frames: self.ready.wait()
+                    frame = self.frames.popleft()
+                if frame is None: break
+                self.connection.sendall(LENGTH.pack(len(frame)) + frame)
+        except OSError: pass
+        finally:
+            self.alive = False
+            self.connection.close()
+
+# Streams one frame per tick to every connected spectator. Frames are encoded
+# once per tick and shared; a spectator that connects (or falls too far
+# behind) gets a keyframe of the current tick and the shared deltas after it.
+class SnapshotServer:
+    def __init__(self, port, host='127.0.0.1', max_backlog=60):
+        self.listener = socket.create_server((host, port))
+        self.address = self.listener.getsockname()
+        self.max_backlog = max_backlog
+        self.capture = StateCapture()
+        self.stats = NetStats()
+        self.spectators = []
+        self.lock = threading.Lock()
+        self.world = None
+        self.state = None
+        threading.Thread(target=self._accept, name='snapshot-server', daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try: connection, _ = self.listener.accept()
+            except OSError: return
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.lock: self.spectators.append(Spectator(connection, self.max_backlog))
+
+    def publish(self, world):
+        if self.state and world is self.world and world.tick_count == self.state.tick and world.status == self.state.status:
+            return
+        with self.lock:
+            self.spectators = [s for s in self.spectators if s.alive]
+            spectators = list(self.spectators)
+        if not spectators:
+            self.world = self.state = None
+            return
+        start = time.perf_counter()
+        previous = self.state if world is self.world else None
+        state = self.capture(world)
+        frame = encode(state, previous)
+        self.stats.record(len(frame), time.perf_counter() - start, previous is None)
+        keyframe = frame if previous is None else None
+        for spectator in spectators:
+            if spectator.needs_keyframe and keyframe is None: keyframe = encode(state)
+            spectator.send(keyframe if spectator.needs_keyframe else frame)
+        self.world, self.state = world, state
+
+    def close(self):
+        self.listener.close()
+        with self.lock:
+            for spectator in self.spectators: spectator.close()
+
+# --- Client ---
+# Receives frames on its own thread and keeps the two latest as Snapshots, so
+# the spectator draws them exactly like a local --threaded game.
+class SnapshotClient(threading.Thread):
+    def __init__(self, host, port, interval=FIXED_DT):
+        super().__init__(name='snapshot-client', daemon=True)
+        self.connection = socket.create_connection((host, port))
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.previous = self.latest = None
+        self.platform_source = None
+        self.platforms = []
+
+    def run(self):
+        state = None
+        reader = self.connection.makefile('rb')
+        try:
+            while True:
+                header = reader.read(LENGTH.size)
+                if len(header) < LENGTH.size: break
+                data = reader.read(LENGTH.unpack(header)[0])
+                state = decode(data, state)
+                if state.platforms is not self.platform_source:
+                    self.platform_source = state.platforms
+                    self.platforms = [Platform(*platform) for platform in state.platforms]
+                snapshot = to_snapshot(state, time.perf_counter(), self.platforms)
+                keyframe = data[0] & FRAME_KEY
+                with self.lock: self.previous, self.latest = snapshot if keyframe else self.latest, snapshot
+        except (OSError, struct.error): pass
+        finally:
+            reader.close()
+            self.connection.close()
+
+    def stop(self):
+        try: self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+
+    def scene(self, now=None):
+        with self.lock: previous, latest = self.previous, self.latest
+        return blend(previous, latest, self.interval, now) if latest else None
+
+# --- Headless Server ---
+def serve_matches(server, policy, matches, max_seconds, seed, level, pause=3.0):
+    # Plays in real time so spectators see the match at normal speed.
+    max_ticks = int(max_seconds / FIXED_DT)
+    for i in range(matches):
+        world = World(seed=seed + i, level=level)
+        next_tick = time.perf_counter()
+        while world.status == WORLD_PLAYING and world.tick_count < max_ticks:
+            world.tick(policy(world))
+            world.events.clear()
+            server.publish(world)
+            next_tick += FIXED_DT
+            delay = next_tick - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+        print(f"Partida {i + 1}: {STATUS_NAMES[world.status]}, pontuação {world.score}")
+        time.sleep(pause)
+
+def measure_matches(policy, matches, max_seconds, seed, level):
+    # Encodes every tick as fast as possible, decoding each frame back to check the round trip.
+    stats = NetStats()
+    mismatches = 0
+    max_ticks = int(max_seconds / FIXED_DT)
+    for i in range(matches):
+        world = World(seed=seed + i, level=level)
+        capture = StateCapture()
+        previous = decoded = None
+        while world.status == WORLD_PLAYING and world.tick_count < max_ticks:
+            world.tick(policy(world))
+            world.events.clear()
+            start = time.perf_counter()
+            state = capture(world)
+            frame = encode(state, previous)
+            stats.record(len(frame), time.perf_counter() - start, previous is None)
+            decoded = decode(frame, decoded)
+            if decoded != state: mismatches += 1
+            previous = state
+    return stats, mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Transmite partidas sem janela para espectadores (python Jogo.py --spectate).")
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--matches', type=int, default=1)
+    parser.add_argument('--max-seconds', type=float, default=120.0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='scripted')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--level', metavar='ARQUIVO', help="joga esta fase em vez da fase padrão")
+    parser.add_argument('--measure', action='store_true',
+                        help="não abre o servidor: codifica cada tick o mais rápido possível e mede banda e tempo")
+    args = parser.parse_args()
+
+    level = load_level(args.level) if args.level else None
+    policy = POLICIES[args.policy](random.Random(args.seed))
+    if args.measure:
+        stats, mismatches = measure_matches(policy, args.matches, args.max_seconds, args.seed, level)
+        for line in stats.report_lines(): print(line)
+        print(f"  ida e volta: {'ok' if not mismatches else f'{mismatches} ticks diferentes'}")
+        return
+    server = SnapshotServer(args.port, args.host)
+    print(f"Servindo em {server.address[0]}:{server.address[1]} (python Jogo.py --spectate {args.host}:{args.port})")
+    try: serve_matches(server, policy, args.matches, args.max_seconds, args.seed, level)
+    except KeyboardInterrupt: pass
+    finally:
+        server.close()
+        for line in server.stats.report_lines(): print(line)
+
+if __name__ == '__main__':
+    main()
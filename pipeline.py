@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import namedtuple
+from pygame import Rect
+from simulation import FIXED_DT, MAX_TICKS_PER_STEP
+
+# --- Snapshots ---
+# Everything the renderer needs from one tick, copied out of the world so the
+# simulation thread can keep going while the frame is drawn. Views carry the
+# attributes the draw functions read from the live objects, so a snapshot can
+# be drawn exactly like a World. Nothing in a published snapshot is mutated.
+EntityView = namedtuple('EntityView', ['key', 'rect', 'animation_frames_names', 'current_frame_index', 'image_scale'])
+PlayerView = namedtuple('PlayerView', ['rect', 'animation_frames_names', 'current_frame_index', 'image_scale',
+                                       'invincibility_timer', 'health', 'max_health'])
+ProjectileView = namedtuple('ProjectileView', ['key', 'rect'])
+Snapshot = namedtuple('Snapshot', ['tick', 'time', 'status', 'score', 'camera_x', 'is_coin_collected',
+                                   'player', 'coin', 'enemies', 'projectiles', 'platforms'])
+
+def entity_view(obj):
+    return EntityView((obj.pool_index, obj.generation), Rect(obj.rect), obj.animation_frames_names,
+                      obj.current_frame_index, obj.image_scale)
+
+def take_snapshot(world, now):
+    player = world.player
+    return Snapshot(
+        world.tick_count, now, world.status, world.score, world.camera_x, world.is_coin_collected,
+        PlayerView(Rect(player.rect), player.animation_frames_names, player.current_frame_index, player.image_scale,
+                   player.invincibility_timer, player.health, player.max_health),
+        EntityView(None, Rect(world.coin.rect), world.coin.animation_frames_names, world.coin.current_frame_index,
+                   world.coin.image_scale),
+        tuple(entity_view(e) for e in world.enemies),
+        tuple(ProjectileView((p.pool_index, p.generation), Rect(p.rect)) for p in world.projectiles),
+        # Streaming replaces the platform list instead of changing it, so the reference is safe to share.
+        world.platforms,
+    )
+
+def lerp_rect(previous, latest, alpha):
+    return Rect(previous.x + (latest.x - previous.x) * alpha, previous.y + (latest.y - previous.y) * alpha,
+                latest.width, latest.height)
+
+def interpolate(previous, latest, alpha):
+    # Entities are matched by pool handle; ones that only exist in the latest
+    # tick are drawn where they are.
+    if previous is latest or alpha >= 1.0: return latest
+    before = {view.key: view.rect for view in previous.enemies}
+    enemies = tuple(view._replace(rect=lerp_rect(before[view.key], view.rect, alpha)) if view.key in before else view
+                    for view in latest.enemies)
+    before = {view.key: view.rect for view in previous.projectiles}
+    projectiles = tuple(view._replace(rect=lerp_rect(before[view.key], view.rect, alpha)) if view.key in before else view
+                        for view in latest.projectiles)
+    return latest._replace(
+        camera_x=round(previous.camera_x + (latest.camera_x - previous.camera_x) * alpha),
+        player=latest.player._replace(rect=lerp_rect(previous.player.rect, latest.player.rect, alpha)),
+        enemies=enemies, projectiles=projectiles)
+
+def blend(previous, latest, interval, now=None):
+    # Shows the frame one tick behind the latest one, moving towards it as time passes.
+    now = time.perf_counter() if now is None else now
+    return interpolate(previous, latest, min(max((now - latest.time) / interval, 0.0), 1.0))
+
+# --- Simulation Thread ---
+# Runs step() at a fixed rate and publishes a snapshot after every tick.
+# step() returns False once the match is over. If the thread falls more than
+# MAX_TICKS_PER_STEP ticks behind it drops the backlog, like World.step().
+class SimulationThread(threading.Thread):
+    def __init__(self, world, step, tick_rate=1 / FIXED_DT):
+        super().__init__(name='simulation', daemon=True)
+        self.world = world
+        self.step = step
+        self.interval = 1 / tick_rate
+        self.lock = threading.Lock()
+        self.running = True
+        now = time.perf_counter()
+        self.previous = self.latest = take_snapshot(world, now)
+
+    def run(self):
+        next_tick = time.perf_counter() + self.interval
+        playing = True
+        while self.running and playing:
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            playing = self.step()
+            self.world.sync_views()
+            snapshot = take_snapshot(self.world, next_tick)
+            with self.lock: self.previous, self.latest = self.latest, snapshot
+            next_tick += self.interval
+            if time.perf_counter() - next_tick > MAX_TICKS_PER_STEP * self.interval: next_tick = time.perf_counter()
+
+    def stop(self):
+        self.running = False
+        if self.is_alive() and threading.current_thread() is not self: self.join()
+
+    def scene(self, now=None):
+        with self.lock: previous, latest = self.previous, self.latest
+        return blend(previous, latest, self.interval, now)
@@ -0,0 +1,57 @@
+from collections import namedtuple
+
+Handle = namedtuple('Handle', ['index', 'generation'])
+
+# --- Entity Pool ---
+# Active objects live in a dense list; release swaps the last one into the
+# freed slot so removal is O(1). Released objects go to a free-list and are
+# reset in place by the next acquire instead of being reallocated.
+class EntityPool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.active = []
+        self.free = []
+        self.objects = []
+
+    def __len__(self): return len(self.active)
+
+    def __iter__(self): return iter(self.active)
+
+    def __getitem__(self, i): return self.active[i]
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+        else:
+            obj = self.factory(*args)
+            obj.pool_index = len(self.objects)
+            obj.generation = 0
+            self.objects.append(obj)
+        obj.generation += 1
+        obj.slot = len(self.active)
+        self.active.append(obj)
+        return obj
+
+    def release(self, obj):
+        slot = obj.slot
+        if slot < 0: return
+        last = self.active.pop()
+        if last is not obj:
+            self.active[slot] = last
+            last.slot = slot
+        obj.slot = -1
+        self.free.append(obj)
+
+    def clear(self):
+        for obj in self.active:
+            obj.slot = -1
+            self.free.append(obj)
+        self.active.clear()
+
+    def handle(self, obj): return Handle(obj.pool_index, obj.generation)
+
+    def get(self, handle):
+        obj = self.objects[handle.index]
+        if obj.generation != handle.generation or obj.slot < 0: return None
+        return obj
@@ -0,0 +1,102 @@
+import csv
+import json
+import sys
+import time
+from collections import deque
+from functools import wraps
+
+# --- Frame Profiler ---
+# Nothing here runs unless instrument() is called, so a game started without
+# profiling pays no cost at all. Memory is tracked as net blocks: the change
+# in sys.getallocatedblocks() across each call. That is allocations minus
+# frees, so it can be negative; a section that keeps growing it is leaking.
+class Profiler:
+    def __init__(self, window=300):
+        self.window = window
+        self.sections = {}
+        self.current = {}
+        self.frame_times = deque(maxlen=window)
+        self.last_frame_end = None
+        self.frame_count = 0
+
+    def instrument(self, owner, attr, name=None):
+        # owner is a class/module, or a globals() dict for the game script itself.
+        name = name or f"{getattr(owner, '__name__', type(owner).__name__)}.{attr}"
+        func = owner[attr] if isinstance(owner, dict) else getattr(owner, attr)
+        current = self.current
+        clock = time.perf_counter
+        blocks = sys.getallocatedblocks
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start_blocks = blocks()
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                sample = current.get(name)
+                if sample is None: current[name] = [elapsed, blocks() - start_blocks, 1]
+                else:
+                    sample[0] += elapsed
+                    sample[1] += blocks() - start_blocks
+                    sample[2] += 1
+
+        if isinstance(owner, dict): owner[attr] = timed
+        else: setattr(owner, attr, timed)
+        self.sections.setdefault(name, deque(maxlen=self.window))
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self.last_frame_end is not None: self.frame_times.append(now - self.last_frame_end)
+        self.last_frame_end = now
+        self.frame_count += 1
+        for name, samples in self.sections.items():
+            sample = self.current.get(name)
+            samples.append((self.frame_count, *(sample or (0.0, 0, 0))))
+        self.current.clear()
+
+    @staticmethod
+    def percentile(values, fraction):
+        if not values: return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def fps(self):
+        if not self.frame_times: return 0.0
+        return len(self.frame_times) / sum(self.frame_times)
+
+    def stats(self):
+        result = {}
+        for name, samples in self.sections.items():
+            times = [s[1] * 1000 for s in samples if s[3]]
+            result[name] = {
+                'p50_ms': self.percentile(times, 0.50),
+                'p95_ms': self.percentile(times, 0.95),
+                'p99_ms': self.percentile(times, 0.99),
+                'calls_per_frame': sum(s[3] for s in samples) / len(samples) if samples else 0.0,
+                'net_blocks_per_frame': sum(s[2] for s in samples) / len(samples) if samples else 0.0,
+            }
+        return result
+
+    def report_lines(self):
+        lines = [f"FPS {self.fps():5.1f}   seção  p50/p95/p99 ms  blocos"]
+        for name, s in sorted(self.stats().items(), key=lambda item: -item[1]['p95_ms']):
+            lines.append(f"{name:<24} {s['p50_ms']:5.2f} {s['p95_ms']:5.2f} {s['p99_ms']:5.2f} {s['net_blocks_per_frame']:6.0f}")
+        return lines
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'section', 'ms', 'net_blocks', 'calls'])
+            for name, samples in self.sections.items():
+                for frame, elapsed, blocks, calls in samples: writer.writerow([frame, name, f"{elapsed * 1000:.4f}", blocks, calls])
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'fps': self.fps(), 'frames': self.frame_count, 'sections': self.stats(),
+                       'samples': {name: list(samples) for name, samples in self.sections.items()}}, f, indent=2)
+
+    def export(self, path):
+        if path.endswith('.json'): self.export_json(path)
+        else: self.export_csv(path)
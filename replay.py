@@ -0,0 +1,132 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from level import level_id, load_level
+from simulation import World, Inputs, WORLD_PLAYING, WORLD_GAME_OVER, WORLD_VICTORY
+
+# --- Replay Format ---
+# Header: magic, version, flags, level seed, level id, tick count.
+# Body: run-length encoded (input mask, repeat count) byte pairs, one mask per tick.
+# Footer: end state (status, score, health, enemies_defeated) for verification.
+REPLAY_MAGIC = b'FXSR'
+REPLAY_VERSION = 2
+HEADER = struct.Struct('<4sBBQII')
+FOOTER = struct.Struct('<Biii')
+FLAG_BATCH = 1
+INPUT_BITS = ('left', 'right', 'run', 'jump', 'shoot')
+STATUS_NAMES = {WORLD_PLAYING: 'timeout', WORLD_GAME_OVER: 'game_over', WORLD_VICTORY: 'victory'}
+
+Replay = namedtuple('Replay', ['seed', 'batch', 'level_id', 'masks', 'end_state'])
+EndState = namedtuple('EndState', ['status', 'score', 'health', 'enemies_defeated'])
+
+def inputs_to_mask(inputs):
+    mask = 0
+    for bit, pressed in enumerate(inputs):
+        if pressed: mask |= 1 << bit
+    return mask
+
+MASK_INPUTS = [Inputs(*(bool(mask & (1 << bit)) for bit in range(len(INPUT_BITS)))) for mask in range(1 << len(INPUT_BITS))]
+
+def end_state_of(world):
+    return EndState(world.status, world.score, world.player.health, world.enemies_defeated)
+
+# --- Recorder ---
+class Recorder:
+    def __init__(self, world):
+        self.world = world
+        self.masks = bytearray()
+        world.recorder = self
+
+    def record(self, inputs):
+        self.masks.append(inputs_to_mask(inputs))
+
+    def encode(self):
+        body = bytearray()
+        i = 0
+        while i < len(self.masks):
+            mask, run = self.masks[i], 1
+            while run < 255 and i + run < len(self.masks) and self.masks[i + run] == mask: run += 1
+            body += bytes((mask, run))
+            i += run
+        flags = FLAG_BATCH if self.world.batch else 0
+        header = HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, flags, self.world.seed, level_id(self.world.level), len(self.masks))
+        return header + bytes(body) + FOOTER.pack(*end_state_of(self.world))
+
+    def save(self, path):
+        with open(path, 'wb') as f: f.write(self.encode())
+
+def decode_replay(data):
+    # Any malformed file is reported as ValueError, which callers already handle.
+    if len(data) < HEADER.size + FOOTER.size: raise ValueError("Arquivo de replay vazio ou incompleto.")
+    magic, version, flags, seed, level, tick_count = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("Arquivo de replay inválido ou de outra versão.")
+    masks = bytearray()
+    body = data[HEADER.size:len(data) - FOOTER.size]
+    if len(body) % 2: raise ValueError("Replay corrompido: entradas incompletas.")
+    for i in range(0, len(body), 2): masks += bytes((body[i],)) * body[i + 1]
+    if len(masks) != tick_count: raise ValueError("Replay corrompido: número de ticks não confere.")
+    if any(mask >= len(MASK_INPUTS) for mask in body[::2]): raise ValueError("Replay corrompido: entrada desconhecida.")
+    end_state = EndState(*FOOTER.unpack_from(data, len(data) - FOOTER.size))
+    if end_state.status not in STATUS_NAMES: raise ValueError("Replay corrompido: estado final desconhecido.")
+    return Replay(seed, bool(flags & FLAG_BATCH), level, bytes(masks), end_state)
+
+def load_replay(path):
+    with open(path, 'rb') as f: return decode_replay(f.read())
+
+# --- Playback ---
+class ReplayPlayer:
+    def __init__(self, replay, level=None):
+        self.replay = replay
+        self.world = World(seed=replay.seed, batch=replay.batch, level=level)
+        if level_id(self.world.level) != replay.level_id:
+            raise ValueError("O replay foi gravado em outra fase (use a mesma --level da gravação).")
+        self.position = 0
+
+    @property
+    def finished(self): return self.position >= len(self.replay.masks) or self.world.status != WORLD_PLAYING
+
+    def advance(self, ticks):
+        while ticks > 0 and not self.finished:
+            self.world.tick(MASK_INPUTS[self.replay.masks[self.position]])
+            self.position += 1
+            ticks -= 1
+
+def run_replay(replay, level=None):
+    player = ReplayPlayer(replay, level)
+    while not player.finished:
+        player.advance(1024)
+        player.world.events.clear()
+    return end_state_of(player.world)
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz replays sem janela e confere o estado final.")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--level', metavar='ARQUIVO', help="fase em que as partidas foram gravadas")
+    args = parser.parse_args()
+    level = load_level(args.level) if args.level else None
+    failures = 0
+    for path in args.files:
+        start = time.perf_counter()
+        try:
+            replay = load_replay(path)
+            result = run_replay(replay, level)
+        except (OSError, ValueError) as e:
+            failures += 1
+            print(f"ERRO {path}: {e}")
+            continue
+        elapsed = time.perf_counter() - start
+        ok = result == replay.end_state
+        failures += not ok
+        speed = len(replay.masks) / 60 / elapsed if elapsed else float('inf')
+        print(f"{'OK ' if ok else 'ERRO'} {path}: {STATUS_NAMES[result.status]}, pontuação {result.score}, "
+              f"vida {result.health}, inimigos {result.enemies_defeated} ({len(replay.masks)} ticks, {speed:.0f}x tempo real)")
+        if not ok: print(f"     esperado: {replay.end_state}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
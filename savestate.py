@@ -0,0 +1,380 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from level import PlatformSpec, level_id, load_level
+from pool import Handle
+from pygame import Rect
+from simulation import World, Enemy, Projectile, Platform, Inputs, FIXED_DT, WORLD_PLAYING
+
+# --- Save Format ---
+# The whole world goes into one flat little-endian buffer, written and read in
+# place with pack_into/unpack_from, so it works the same on a reused bytearray
+# and on a memory-mapped file. Sections, in order:
+#   header, world, RNG, player, coin
+#   enemy pool: generation of every pooled object, free-list order, one record
+#     per active enemy in pool order, then the batch row order (batch mode)
+#   projectile pool: same layout, without a row order
+#   platforms with their chunk reference counts, active chunks with the enemy
+#   handles they spawned, enemies that outlived their chunk, defeated spawn ids
+# Pool layout and orders are kept so a restored world continues exactly like
+# the original would have.
+SAVE_MAGIC = b'FXSV'
+SAVE_VERSION = 2
+HEADER = struct.Struct('<4sHII')  # magic, version, level id, size
+WORLD = struct.Struct('<QIBiIi?d??')  # seed, tick, status, score, enemies defeated, camera_x, coin collected, accumulator, pending jump/shoot
+RNG = struct.Struct('<i625I?d')  # Mersenne Twister state; gauss_next as (present, value)
+PLAYER = struct.Struct('<iidd????d?diidbId')
+COIN = struct.Struct('<iiId')
+ENEMY = struct.Struct('<Ii?iidd?dii?i?dbddIbId')
+PROJECTILE = struct.Struct('<Iiib?')
+PLATFORM = struct.Struct('<iiiiI')  # x, y, width, height, chunk references
+CHUNK = struct.Struct('<II')  # chunk index, handle count
+HANDLE = struct.Struct('<II')
+ROAMING = struct.Struct('<iII')  # spawn id, handle
+COUNT = struct.Struct('<I')
+INDEX = struct.Struct('<I')
+SPAWN = struct.Struct('<i')
+
+# --- Checkpoints and Slots ---
+CHECKPOINT_SECONDS = 5.0
+CHECKPOINT_COUNT = 3
+SLOT_SIZE = 1024 * 1024
+
+def pool_size(pool, record):
+    return 3 * COUNT.size + len(pool.objects) * INDEX.size + len(pool.free) * INDEX.size + len(pool.active) * record.size
+
+def state_size(world):
+    rows = len(world.enemy_batch.views) if world.enemy_batch is not None else 0
+    handles = sum(CHUNK.size + len(h) * HANDLE.size for _, h in world.active_chunks.values())
+    return (HEADER.size + WORLD.size + RNG.size + PLAYER.size + COIN.size
+            + pool_size(world.enemies, ENEMY) + COUNT.size + rows * INDEX.size
+            + pool_size(world.projectiles, PROJECTILE)
+            + COUNT.size + len(world.platforms) * PLATFORM.size
+            + COUNT.size + handles
+            + COUNT.size + len(world.roaming_enemies) * ROAMING.size
+            + COUNT.size + len(world.defeated_spawns) * SPAWN.size)
+
+# --- Records ---
+def pack_enemy(buffer, offset, e):
+    ENEMY.pack_into(buffer, offset, e.pool_index, -1 if e.spawn_id is None else e.spawn_id, e.alive, e.rect.x, e.rect.y,
+                    e.vx, e.vy, e.on_ground, e.cooldown_timer, e.patrol_start_x, e.patrol_end_x, e.facing_right,
+                    e.health, e.is_aggro, e.deaggro_timer, e.state, e.patrol_timer, e.wait_timer, e.ai_skipped, e.clip,
+                    e.current_frame_index, e.animation_timer)
+
+def unpack_enemy(e, values, rng):
+    (_, spawn_id, e.alive, x, y, e.vx, e.vy, e.on_ground, e.cooldown_timer, e.patrol_start_x, e.patrol_end_x,
+     e.facing_right, e.health, e.is_aggro, e.deaggro_timer, e.state, e.patrol_timer, e.wait_timer, e.ai_skipped, e.clip,
+     e.current_frame_index, e.animation_timer) = values
+    e.spawn_id = None if spawn_id < 0 else spawn_id
+    e.rect.topleft = (x, y)
+    e.rng = rng
+
+def pack_projectile(buffer, offset, p):
+    PROJECTILE.pack_into(buffer, offset, p.pool_index, p.rect.x, p.rect.y, p.direction, p.alive)
+
+def unpack_projectile(p, values, rng):
+    _, x, y, p.direction, p.alive = values
+    p.rect.topleft = (x, y)
+
+def write_pool(buffer, offset, pool, record, pack):
+    COUNT.pack_into(buffer, offset, len(pool.objects))
+    offset += COUNT.size
+    for obj in pool.objects:
+        INDEX.pack_into(buffer, offset, obj.generation)
+        offset += INDEX.size
+    COUNT.pack_into(buffer, offset, len(pool.free))
+    offset += COUNT.size
+    for obj in pool.free:
+        INDEX.pack_into(buffer, offset, obj.pool_index)
+        offset += INDEX.size
+    COUNT.pack_into(buffer, offset, len(pool.active))
+    offset += COUNT.size
+    for obj in pool.active:
+        pack(buffer, offset, obj)
+        offset += record.size
+    return offset
+
+def read_pool(buffer, offset, pool, record, factory, unpack, rng):
+    # Pooled objects are reused; missing ones are created and extra ones dropped.
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    objects = pool.objects
+    while len(objects) < count:
+        obj = factory()
+        obj.pool_index = len(objects)
+        objects.append(obj)
+    del objects[count:]
+    for obj in objects:
+        (obj.generation,) = INDEX.unpack_from(buffer, offset)
+        obj.slot = -1
+        offset += INDEX.size
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    pool.free[:] = [objects[INDEX.unpack_from(buffer, offset + i * INDEX.size)[0]] for i in range(count)]
+    offset += count * INDEX.size
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    pool.active.clear()
+    for slot in range(count):
+        values = record.unpack_from(buffer, offset)
+        offset += record.size
+        obj = objects[values[0]]
+        unpack(obj, values, rng)
+        obj.slot = slot
+        pool.active.append(obj)
+    return offset
+
+# --- Save / Load ---
+def save_state(world, buffer):
+    world.sync_views()
+    size = state_size(world)
+    if size > len(buffer): raise ValueError(f"o estado precisa de {size} bytes e o espaço é de {len(buffer)}")
+    offset = HEADER.pack_into(buffer, 0, SAVE_MAGIC, SAVE_VERSION, level_id(world.level), size) or HEADER.size
+    WORLD.pack_into(buffer, offset, world.seed, world.tick_count, world.status, world.score, world.enemies_defeated,
+                    world.camera_x, world.is_coin_collected, world.accumulator, world.pending_jump, world.pending_shoot)
+    offset += WORLD.size
+    version, internal, gauss_next = world.rng.getstate()
+    RNG.pack_into(buffer, offset, version, *internal, gauss_next is not None, gauss_next or 0.0)
+    offset += RNG.size
+    p = world.player
+    PLAYER.pack_into(buffer, offset, p.rect.x, p.rect.y, p.vx, p.vy, p.on_ground, p.is_moving, p.is_running,
+                     p.facing_right, p.attack_cooldown, p.is_attacking, p.attack_animation_timer, p.health, p.max_health,
+                     p.invincibility_timer, p.clip, p.current_frame_index, p.animation_timer)
+    offset += PLAYER.size
+    coin = world.coin
+    COIN.pack_into(buffer, offset, coin.rect.x, coin.rect.y, coin.current_frame_index, coin.animation_timer)
+    offset += COIN.size
+
+    offset = write_pool(buffer, offset, world.enemies, ENEMY, pack_enemy)
+    rows = world.enemy_batch.views if world.enemy_batch is not None else ()
+    COUNT.pack_into(buffer, offset, len(rows))
+    offset += COUNT.size
+    for enemy in rows:
+        INDEX.pack_into(buffer, offset, enemy.pool_index)
+        offset += INDEX.size
+    offset = write_pool(buffer, offset, world.projectiles, PROJECTILE, pack_projectile)
+
+    COUNT.pack_into(buffer, offset, len(world.platforms))
+    offset += COUNT.size
+    for platform in world.platforms:
+        entry = world.platform_refs.get(tuple(platform.rect))
+        PLATFORM.pack_into(buffer, offset, *platform.rect, entry[1] if entry and entry[0] is platform else 0)
+        offset += PLATFORM.size
+    COUNT.pack_into(buffer, offset, len(world.active_chunks))
+    offset += COUNT.size
+    for index, (_, handles) in world.active_chunks.items():
+        CHUNK.pack_into(buffer, offset, index, len(handles))
+        offset += CHUNK.size
+        for handle in handles:
+            HANDLE.pack_into(buffer, offset, *handle)
+            offset += HANDLE.size
+    COUNT.pack_into(buffer, offset, len(world.roaming_enemies))
+    offset += COUNT.size
+    for spawn_id, handle in world.roaming_enemies.items():
+        ROAMING.pack_into(buffer, offset, spawn_id, *handle)
+        offset += ROAMING.size
+    COUNT.pack_into(buffer, offset, len(world.defeated_spawns))
+    offset += COUNT.size
+    for spawn_id in world.defeated_spawns:
+        SPAWN.pack_into(buffer, offset, spawn_id)
+        offset += SPAWN.size
+    return size
+
+def load_state(world, buffer):
+    # Restores in place, so everything holding the world (the bus, a recorder,
+    # the renderer) keeps working. Checked before anything is changed.
+    magic, version, level, size = HEADER.unpack_from(buffer)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION or size > len(buffer):
+        raise ValueError("save inválido ou de outra versão")
+    if level != level_id(world.level): raise ValueError("o save é de outra fase")
+    offset = HEADER.size
+    (world.seed, world.tick_count, world.status, world.score, world.enemies_defeated, world.camera_x,
+     world.is_coin_collected, world.accumulator, world.pending_jump, world.pending_shoot) = WORLD.unpack_from(buffer, offset)
+    offset += WORLD.size
+    rng_state = RNG.unpack_from(buffer, offset)
+    offset += RNG.size
+    p = world.player
+    (x, y, p.vx, p.vy, p.on_ground, p.is_moving, p.is_running, p.facing_right, p.attack_cooldown, p.is_attacking,
+     p.attack_animation_timer, p.health, p.max_health, p.invincibility_timer, p.clip, p.current_frame_index,
+     p.animation_timer) = PLAYER.unpack_from(buffer, offset)
+    p.rect.topleft = (x, y)
+    offset += PLAYER.size
+    x, y, world.coin.current_frame_index, world.coin.animation_timer = COIN.unpack_from(buffer, offset)
+    world.coin.rect.topleft = (x, y)
+    offset += COIN.size
+
+    rng = world.rng
+    offset = read_pool(buffer, offset, world.enemies, ENEMY, lambda: Enemy(0, 0, 0, 0, rng), unpack_enemy, rng)
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    rows = [world.enemies.objects[INDEX.unpack_from(buffer, offset + i * INDEX.size)[0]] for i in range(count)]
+    offset += count * INDEX.size
+    offset = read_pool(buffer, offset, world.projectiles, PROJECTILE, lambda: Projectile(0, 0, True), unpack_projectile, rng)
+
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    world.platforms = []
+    world.platform_refs = {}
+    for _ in range(count):
+        x, y, width, height, references = PLATFORM.unpack_from(buffer, offset)
+        offset += PLATFORM.size
+        platform = Platform(x, y, width, height)
+        world.platforms.append(platform)
+        if references: world.platform_refs[PlatformSpec(x, y, width, height)] = [platform, references]
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    world.active_chunks = {}
+    for _ in range(count):
+        index, handle_count = CHUNK.unpack_from(buffer, offset)
+        offset += CHUNK.size
+        chunk = world.loaded_chunks.get(index)
+        if chunk is None: chunk = world.loaded_chunks[index] = world.level.read_chunk(index)
+        world.active_chunks[index] = (chunk, [Handle(*HANDLE.unpack_from(buffer, offset + i * HANDLE.size))
+                                              for i in range(handle_count)])
+        offset += handle_count * HANDLE.size
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    world.roaming_enemies = {}
+    for _ in range(count):
+        spawn_id, index, generation = ROAMING.unpack_from(buffer, offset)
+        offset += ROAMING.size
+        world.roaming_enemies[spawn_id] = Handle(index, generation)
+    (count,) = COUNT.unpack_from(buffer, offset)
+    offset += COUNT.size
+    world.defeated_spawns = {SPAWN.unpack_from(buffer, offset + i * SPAWN.size)[0] for i in range(count)}
+
+    world.index_platforms()
+    world.streamed_camera_x = None
+    world.events.clear()
+    if world.batch:
+        world.projectile_batch = None
+        world.start_batch(rows)
+    # Last, since creating pooled enemies above draws from the generator.
+    version, *internal, has_gauss, gauss_next = rng_state
+    rng.setstate((version, tuple(internal), gauss_next if has_gauss else None))
+
+class Checkpoints:
+    # A ring of preallocated buffers; each checkpoint overwrites the oldest one.
+    # Checkpoints are only taken on the ground and outside invincibility, so a
+    # retry never starts mid-fall or right after a hit.
+    def __init__(self, seconds=CHECKPOINT_SECONDS, count=CHECKPOINT_COUNT, capacity=64 * 1024):
+        self.interval = max(1, round(seconds / FIXED_DT))
+        self.buffers = [bytearray(capacity) for _ in range(count)]
+        self.ticks = [None] * count
+        self.next = 0
+        self.last_tick = None
+
+    @property
+    def available(self): return any(tick is not None for tick in self.ticks)
+
+    def clear(self):
+        self.ticks = [None] * len(self.ticks)
+        self.last_tick = None
+
+    def update(self, world):
+        player = world.player
+        if world.status != WORLD_PLAYING or not player.on_ground or player.invincibility_timer > 0: return False
+        if self.last_tick is not None and world.tick_count - self.last_tick < self.interval: return False
+        world.sync_views()
+        if state_size(world) > len(self.buffers[self.next]): self.buffers[self.next] = bytearray(2 * state_size(world))
+        save_state(world, self.buffers[self.next])
+        self.ticks[self.next] = self.last_tick = world.tick_count
+        self.next = (self.next + 1) % len(self.buffers)
+        return True
+
+    def restore(self, world):
+        # Goes back to the newest checkpoint.
+        if not self.available: return False
+        newest = max((tick, i) for i, tick in enumerate(self.ticks) if tick is not None)[1]
+        load_state(world, self.buffers[newest])
+        self.last_tick = world.tick_count
+        return True
+
+class SaveSlots:
+    # Each slot is a fixed-size file, memory-mapped so the state is packed
+    # straight into the page cache and unpacked straight out of it.
+    def __init__(self, folder='saves', slot_size=SLOT_SIZE):
+        self.folder = folder
+        self.slot_size = slot_size
+
+    def path(self, slot): return os.path.join(self.folder, f"slot_{slot}.sav")
+
+    def save(self, world, slot):
+        os.makedirs(self.folder, exist_ok=True)
+        fd = os.open(self.path(slot), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != self.slot_size: os.ftruncate(fd, self.slot_size)
+            with mmap.mmap(fd, self.slot_size) as mapped:
+                size = save_state(world, mapped)
+                mapped.flush()
+        finally:
+            os.close(fd)
+        return size
+
+    def load(self, world, slot):
+        with open(self.path(slot), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            load_state(world, mapped)
+
+# --- Preparing Saves ---
+STEP_HEIGHT = 110  # platforms up to this far above the feet can be jumped onto
+STEP_DISTANCE = 60
+
+def run_right_policy(world):
+    # Runs to the right, jumping where no floor is left below and onto steps just ahead,
+    # since platforms over a gap can be too low to jump under. It only shoots at
+    # an enemy in front, because attacking stops the hero and blocks jumps.
+    player = world.player
+    rect = player.rect
+    probe = Rect(rect.right + 20, rect.bottom + 5, 1, world.level.height)  # a drop to a lower floor is not a gap
+    gap_ahead = not any(probe.colliderect(p.rect) for p in world.platform_index.query(probe))
+    ahead = Rect(rect.right, rect.bottom - STEP_HEIGHT, STEP_DISTANCE, STEP_HEIGHT - 20)
+    step_ahead = any(ahead.colliderect(p.rect) and p.rect.top < rect.bottom - 20 for p in world.platform_index.query(ahead))
+    enemy_ahead = any(e.rect.right > rect.centerx and e.rect.left - rect.right < 250 and abs(e.rect.bottom - rect.bottom) < 20
+                      for e in world.enemies)
+    return Inputs(False, True, True, gap_ahead or step_ahead, enemy_ahead and not gap_ahead)
+
+def main():
+    from headless import POLICIES
+    parser = argparse.ArgumentParser(description="Joga sem janela até um ponto da fase e salva o estado num slot "
+                                                 "(depois: python Jogo.py --slot N --load).")
+    parser.add_argument('--slot', type=int, default=1)
+    parser.add_argument('--folder', default='saves')
+    parser.add_argument('--level', metavar='ARQUIVO', help="fase do save (use a mesma no Jogo.py)")
+    parser.add_argument('--until-x', type=int, metavar='PIXELS', help="joga até o herói passar deste x")
+    parser.add_argument('--seconds', type=float, default=0.0, help="joga por este tempo antes de salvar")
+    parser.add_argument('--policy', choices=sorted(POLICIES),
+                        help="quem joga até o ponto (padrão: corre para a direita com --until-x, senão scripted)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--immortal', action='store_true', help="o herói não perde vida até chegar ao ponto")
+    parser.add_argument('--max-seconds', type=float, default=600.0, help="desiste se o ponto não for alcançado neste tempo")
+    args = parser.parse_args()
+
+    world = World(seed=args.seed, level=load_level(args.level) if args.level else None)
+    if args.policy is None and args.until_x is not None: policy = run_right_policy
+    else: policy = POLICIES[args.policy or 'scripted'](random.Random(args.seed))
+    max_health = world.player.max_health
+    while world.status == WORLD_PLAYING:
+        if args.until_x is None and world.tick_count * FIXED_DT >= args.seconds: break
+        if args.until_x is not None and world.player.rect.x >= args.until_x: break
+        if world.tick_count * FIXED_DT >= args.max_seconds: parser.exit(1, "O ponto pedido não foi alcançado a tempo.\n")
+        if args.immortal: world.player.health = max_health
+        world.tick(policy(world))
+        world.events.clear()
+    if world.status != WORLD_PLAYING:
+        parser.exit(1, f"A partida terminou antes do ponto pedido (tick {world.tick_count}, x {world.player.rect.x}).\n")
+
+    slots = SaveSlots(args.folder)
+    start = time.perf_counter()
+    size = slots.save(world, args.slot)
+    saved = time.perf_counter()
+    slots.load(world, args.slot)
+    loaded = time.perf_counter()
+    print(f"{slots.path(args.slot)}: tick {world.tick_count}, x {world.player.rect.x}, {len(world.enemies)} inimigos, "
+          f"{size} bytes (salvar {(saved - start) * 1e3:.2f} ms, carregar {(loaded - saved) * 1e3:.2f} ms)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,629 @@
+import random
+from collections import namedtuple
+from pygame import Rect
+from level import default_level
+from pool import EntityPool
+from spatial import SpatialHash
+
+# --- Game Constants ---
+WIDTH = 800
+HEIGHT = 600
+GRAVITY = 0.5
+PLAYER_JUMP_VELOCITY = -12
+PLAYER_WALK_SPEED = 3
+PLAYER_RUN_SPEED = 6
+ENEMY_WALK_SPEED = 1.5
+ENEMY_RUN_SPEED = 4
+MAX_FALL_SPEED = 10
+ENEMY_SIGHT_RANGE = 200
+ENEMY_ATTACK_COOLDOWN = 1.5
+ENEMY_EDGE_DETECTION_OFFSET = 5
+PROJECTILE_SPEED = 8
+ATTACK_COOLDOWN = 0.5
+COIN_SIZE = 24
+COIN_IMAGE_SIZE = 35
+COIN_FRAME_COUNT = 30
+PLATFORM_CELL_SIZE = 128
+ENTITY_CELL_SIZE = 64
+COLLISION_QUERY_MARGIN = 16
+
+# --- Level Streaming ---
+# Chunks within CHUNK_ACTIVE_MARGIN of the screen are active; they stay active
+# until twice that far away. Chunks within CHUNK_PREFETCH_MARGIN are read ahead,
+# at most CHUNK_LOADS_PER_TICK per tick.
+CHUNK_ACTIVE_MARGIN = 400
+CHUNK_PREFETCH_MARGIN = 1600
+CHUNK_LOADS_PER_TICK = 1
+
+# --- AI Levels of Detail ---
+# Enemies within AI_NEAR_DISTANCE of the player (horizontally) run the full
+# state machine every tick; this always covers the screen and the sight range.
+# Calm enemies farther out only walk their patrol route and are fast-forwarded
+# once every AI_FAR_INTERVAL ticks. AI_FAR_INTERVAL = 1 updates every enemy in
+# full every tick.
+AI_NEAR_DISTANCE = WIDTH
+AI_FAR_INTERVAL = 4
+
+# --- Simulation Timing ---
+FIXED_DT = 1 / 60
+MAX_TICKS_PER_STEP = 5
+
+# --- World Status ---
+WORLD_PLAYING = 0
+WORLD_GAME_OVER = 1
+WORLD_VICTORY = 2
+
+# jump and shoot are "pressed since the last tick"; the others are held keys.
+Inputs = namedtuple('Inputs', ['left', 'right', 'run', 'jump', 'shoot'])
+NO_INPUTS = Inputs(False, False, False, False, False)
+
+# --- Animation Clips ---
+# Clips live in one immutable table per class and objects only store the clip
+# id. Character tables come in left/right pairs: the right-facing clip id is
+# the left one + 1, so a clip is chosen with CLIP_* + facing_right.
+Clip = namedtuple('Clip', ['frames', 'speed', 'loop'])
+CLIP_ATTACK, CLIP_IDLE, CLIP_WALK, CLIP_RUN = 0, 2, 4, 6
+NO_CLIP = -1
+
+def character_clips(prefix):
+    return tuple(Clip((f"{prefix}_{action}_{side}_0", f"{prefix}_{action}_{side}_1"), 0.1, action != 'attack')
+                 for action in ('attack', 'idle', 'walk', 'run') for side in ('left', 'right'))
+
+# --- Enemy States ---
+STATE_PATROLLING, STATE_WAITING, STATE_ATTACKING = 0, 1, 2
+
+# Reused by the enemy ground probes instead of allocating a Rect per check.
+PROBE = Rect(0, 0, 1, 1)
+
+# --- Classes ---
+class GameObject:
+    __slots__ = ('rect', 'clip', 'current_frame_index', 'animation_timer')
+    CLIPS = ()
+    image_scale = 1.0
+
+    def __init__(self, x, y, width, height):
+        self.rect = Rect(x, y, width, height)
+        self.clip = NO_CLIP
+        self.current_frame_index = 0
+        self.animation_timer = 0
+
+    @property
+    def animation_frames_names(self):
+        return self.CLIPS[self.clip].frames if self.clip != NO_CLIP else ()
+
+    def set_clip(self, clip):
+        if self.clip != clip:
+            self.clip = clip
+            self.current_frame_index = 0
+            self.animation_timer = 0
+
+    def animate(self, dt):
+        if self.clip == NO_CLIP: return
+        clip = self.CLIPS[self.clip]
+        count = len(clip.frames)
+        if count <= 1:
+            self.current_frame_index = 0
+            return
+        self.animation_timer += dt
+        if self.animation_timer >= clip.speed:
+            self.animation_timer = 0
+            if clip.loop: self.current_frame_index = (self.current_frame_index + 1) % count
+            elif self.current_frame_index < count - 1: self.current_frame_index += 1
+
+class Player(GameObject):
+    __slots__ = ('events', 'vx', 'vy', 'on_ground', 'is_moving', 'is_running', 'facing_right', 'attack_cooldown',
+                 'is_attacking', 'attack_animation_timer', 'health', 'max_health', 'invincibility_timer')
+    CLIPS = character_clips('hero')
+
+    def __init__(self, x, y, events):
+        super().__init__(x, y, 40, 60)
+        self.events = events
+        self.vx, self.vy = 0, 0
+        self.on_ground = False
+        self.is_moving = False
+        self.is_running = False
+        self.facing_right = True
+        self.attack_cooldown = 0
+        self.is_attacking = False
+        self.attack_animation_timer = 0
+
+        self.health = 5
+        self.max_health = 5
+        self.invincibility_timer = 0.0
+        self.set_clip(CLIP_IDLE + 1)
+
+    def update(self, dt, platform_index, inputs):
+        if self.attack_cooldown > 0: self.attack_cooldown -= dt
+        if self.attack_animation_timer > 0:
+            self.attack_animation_timer -= dt
+            if self.attack_animation_timer <= 0: self.is_attacking = False
+        if self.invincibility_timer > 0: self.invincibility_timer -= dt
+
+        if not self.is_attacking:
+            current_speed = PLAYER_RUN_SPEED if self.is_running else PLAYER_WALK_SPEED
+            if inputs.left: self.vx, self.facing_right, self.is_moving = -current_speed, False, True
+            elif inputs.right: self.vx, self.facing_right, self.is_moving = current_speed, True, True
+            else: self.vx, self.is_moving = 0, False
+        else:
+             self.vx, self.is_moving = 0, False
+
+        self.vy += GRAVITY
+        if self.vy > MAX_FALL_SPEED: self.vy = MAX_FALL_SPEED
+        self.rect.y += self.vy
+
+        self.on_ground = False
+        for p in platform_index.query(self.rect, COLLISION_QUERY_MARGIN):
+            if self.rect.colliderect(p.rect) and self.vy > 0:
+                self.rect.bottom = p.rect.top
+                self.vy, self.on_ground = 0, True
+
+        self.rect.x += self.vx
+        for p in platform_index.query(self.rect, COLLISION_QUERY_MARGIN):
+            if self.rect.colliderect(p.rect):
+                if self.vx > 0: self.rect.right = p.rect.left
+                elif self.vx < 0: self.rect.left = p.rect.right
+
+        if self.is_attacking: self.set_clip(CLIP_ATTACK + self.facing_right)
+        elif self.is_moving: self.set_clip((CLIP_RUN if self.is_running else CLIP_WALK) + self.facing_right)
+        else: self.set_clip(CLIP_IDLE + self.facing_right)
+
+        self.animate(dt)
+
+    def take_damage(self, amount):
+        if self.invincibility_timer <= 0:
+            self.health -= amount
+            self.invincibility_timer = 1.5
+            self.events.append('player_hit')
+
+    def jump(self):
+        if self.on_ground and not self.is_attacking:
+            self.vy = PLAYER_JUMP_VELOCITY
+            self.events.append('jump')
+
+    def shoot(self, projectiles):
+        if self.attack_cooldown <= 0:
+            self.attack_cooldown = ATTACK_COOLDOWN
+            self.is_attacking = True
+            self.attack_animation_timer = 0.3
+            self.events.append('shoot')
+            return projectiles.acquire(self.rect.centerx, self.rect.centery, self.facing_right)
+        return None
+
+class Enemy(GameObject):
+    __slots__ = ('rng', 'spawn_id', 'alive', 'vx', 'vy', 'on_ground', 'cooldown_timer', 'patrol_start_x', 'patrol_end_x',
+                 'facing_right', 'health', 'is_aggro', 'deaggro_timer', 'state', 'patrol_timer', 'wait_timer',
+                 'ai_skipped', 'pool_index', 'generation', 'slot')
+    CLIPS = character_clips('enemy')
+    DEAGGRO_TIME = 5.0
+
+    def __init__(self, x, y, patrol_start_x, patrol_end_x, rng=random, spawn_id=None):
+        super().__init__(x, y, 40, 60)
+        self.reset(x, y, patrol_start_x, patrol_end_x, rng, spawn_id)
+
+    def reset(self, x, y, patrol_start_x, patrol_end_x, rng=random, spawn_id=None):
+        self.rect.topleft = (x, y)
+        self.rng = rng
+        self.spawn_id = spawn_id
+        self.alive = True
+        self.vx, self.vy = 0, 0
+        self.on_ground = False
+        self.cooldown_timer = 0.0
+        self.patrol_start_x, self.patrol_end_x = patrol_start_x, patrol_end_x
+        self.facing_right = True
+        self.health = 3
+        self.is_aggro = False
+        self.deaggro_timer = 0.0
+
+        self.state = STATE_PATROLLING
+        self.patrol_timer = self.rng.uniform(3.0, 6.0)
+        self.wait_timer = 0.0
+        self.ai_skipped = 0
+
+        self.clip = NO_CLIP
+        self.set_clip(CLIP_WALK + 1)
+
+    def on_hit(self):
+        if self.health > 0:
+            self.health -= 1
+            self.is_aggro = True
+            self.deaggro_timer = self.DEAGGRO_TIME
+
+    def update(self, dt, player, platform_index):
+        if self.cooldown_timer > 0: self.cooldown_timer -= dt
+
+        if self.state == STATE_ATTACKING and self.current_frame_index == len(self.CLIPS[self.clip].frames) - 1:
+            self.state = STATE_PATROLLING
+
+        self.vy += GRAVITY
+        if self.vy > MAX_FALL_SPEED: self.vy = MAX_FALL_SPEED
+        self.rect.y += self.vy
+
+        self.on_ground = False
+        for p in platform_index.query(self.rect, COLLISION_QUERY_MARGIN):
+            if self.rect.colliderect(p.rect) and self.vy >= 0:
+                self.rect.bottom = p.rect.top
+                self.vy, self.on_ground = 0, True
+
+        dx, dy = self.rect.centerx - player.rect.centerx, self.rect.centery - player.rect.centery
+        in_sight = dx * dx + dy * dy < ENEMY_SIGHT_RANGE * ENEMY_SIGHT_RANGE and abs(self.rect.y - player.rect.y) < 50
+
+        if self.is_aggro:
+            if in_sight:
+                self.deaggro_timer = self.DEAGGRO_TIME
+            else:
+                self.deaggro_timer -= dt
+                if self.deaggro_timer <= 0:
+                    self.is_aggro = False
+
+        is_pursuing = in_sight or self.is_aggro
+
+        if self.rect.colliderect(player.rect) and self.cooldown_timer <= 0:
+            self.state = STATE_ATTACKING
+            self.cooldown_timer = ENEMY_ATTACK_COOLDOWN
+            player.take_damage(1)
+
+        target_vx = 0
+        clip = self.clip
+
+        if self.state == STATE_ATTACKING:
+            target_vx = 0
+            clip = CLIP_ATTACK + self.facing_right
+        elif is_pursuing:
+            self.state = STATE_PATROLLING
+            if self.rect.centerx < player.rect.centerx: target_vx, self.facing_right = ENEMY_RUN_SPEED, True
+            else: target_vx, self.facing_right = -ENEMY_RUN_SPEED, False
+            clip = CLIP_RUN + self.facing_right
+        else:
+            if self.state == STATE_PATROLLING:
+                target_vx = ENEMY_WALK_SPEED if self.facing_right else -ENEMY_WALK_SPEED
+                clip = CLIP_WALK + self.facing_right
+                self.patrol_timer -= dt
+                if self.patrol_timer <= 0: self.state, self.wait_timer = STATE_WAITING, self.rng.uniform(2.0, 4.0)
+            elif self.state == STATE_WAITING:
+                target_vx = 0
+                clip = CLIP_IDLE + self.facing_right
+                self.wait_timer -= dt
+                if self.wait_timer <= 0: self.state, self.patrol_timer = STATE_PATROLLING, self.rng.uniform(3.0, 6.0)
+
+        should_reverse = False
+        if target_vx != 0:
+            check_x = self.rect.right + ENEMY_EDGE_DETECTION_OFFSET if target_vx > 0 else self.rect.left - ENEMY_EDGE_DETECTION_OFFSET
+            PROBE.update(check_x, self.rect.bottom + 5, 1, 1)
+            on_ground_ahead = any(PROBE.colliderect(p.rect) for p in platform_index.query(PROBE))
+            if not on_ground_ahead and self.on_ground: should_reverse = True
+
+        if not is_pursuing and self.state != STATE_ATTACKING:
+            if (target_vx > 0 and self.rect.right >= self.patrol_end_x) or \
+               (target_vx < 0 and self.rect.left <= self.patrol_start_x):
+                should_reverse = True
+
+        if should_reverse and self.state == STATE_PATROLLING: self.facing_right = not self.facing_right
+
+        self.vx = target_vx
+        self.rect.x += self.vx
+        for p in platform_index.query(self.rect, COLLISION_QUERY_MARGIN):
+            if self.rect.colliderect(p.rect):
+                if self.vx > 0: self.rect.right = p.rect.left
+                elif self.vx < 0: self.rect.left = p.rect.right
+
+        self.set_clip(clip)
+        self.animate(dt)
+
+    def is_calm(self):
+        return self.on_ground and self.vy == 0 and not self.is_aggro and self.state != STATE_ATTACKING
+
+    def fast_forward(self, ticks, dt, platform_index):
+        # Coarse update for a calm enemy out of the player's reach: the patrol
+        # timers run for the whole stretch and the distance walked is folded back
+        # and forth between the patrol bounds, clipped to the platform underfoot.
+        duration = ticks * dt
+        if self.cooldown_timer > 0: self.cooldown_timer -= duration
+        walked = 0.0
+        while duration > 0:
+            if self.state == STATE_PATROLLING:
+                spent = min(duration, self.patrol_timer)
+                walked += spent
+                self.patrol_timer -= spent
+                if self.patrol_timer <= 0: self.state, self.wait_timer = STATE_WAITING, self.rng.uniform(2.0, 4.0)
+            else:
+                spent = min(duration, self.wait_timer)
+                self.wait_timer -= spent
+                if self.wait_timer <= 0: self.state, self.patrol_timer = STATE_PATROLLING, self.rng.uniform(3.0, 6.0)
+            duration -= spent
+
+        rect = self.rect
+        low, high = self.patrol_start_x, self.patrol_end_x - rect.width
+        PROBE.update(rect.x, rect.bottom, rect.width, 1)
+        for p in platform_index.query(PROBE):
+            if p.rect.top == rect.bottom and PROBE.colliderect(p.rect):
+                low, high = max(low, p.rect.left), min(high, p.rect.right - rect.width)
+                break
+        x, distance = min(max(rect.x, low), high), ENEMY_WALK_SPEED * walked / dt
+        while distance > 0 and high > low:
+            room = high - x if self.facing_right else x - low
+            if distance <= room:
+                x += distance if self.facing_right else -distance
+                break
+            x = high if self.facing_right else low
+            distance -= room
+            self.facing_right = not self.facing_right
+        if high > low: rect.x = round(x)
+
+        walking = self.state == STATE_PATROLLING
+        self.vx = (ENEMY_WALK_SPEED if self.facing_right else -ENEMY_WALK_SPEED) if walking else 0
+        self.set_clip((CLIP_WALK if walking else CLIP_IDLE) + self.facing_right)
+        self.animate(ticks * dt)
+
+class Projectile:
+    __slots__ = ('rect', 'direction', 'alive', 'pool_index', 'generation', 'slot')
+
+    def __init__(self, x, y, is_facing_right):
+        self.rect = Rect(x - 5, y - 5, 10, 10)
+        self.direction = 1 if is_facing_right else -1
+        self.alive = True
+    def reset(self, x, y, is_facing_right):
+        self.rect.update(x - 5, y - 5, 10, 10)
+        self.direction = 1 if is_facing_right else -1
+        self.alive = True
+    def update(self): self.rect.x += PROJECTILE_SPEED * self.direction
+
+class Platform:
+    __slots__ = ('rect',)
+
+    def __init__(self, x, y, width, height):
+        self.rect = Rect(x, y, width, height)
+
+class Coin(GameObject):
+    __slots__ = ()
+    CLIPS = (Clip(tuple(f"coin_{i}" for i in range(COIN_FRAME_COUNT)), 0.1, True),)
+    image_scale = COIN_SIZE / COIN_IMAGE_SIZE
+
+    def __init__(self, x, y):
+        super().__init__(x, y, COIN_SIZE, COIN_SIZE)
+        self.set_clip(0)
+
+# --- World ---
+class World:
+    def __init__(self, seed=None, batch=False, level=None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.batch = batch
+        self.level = level or default_level()
+        self.recorder = None
+        self.bus = None
+        self.events = []
+        self.accumulator = 0.0
+        self.tick_count = 0
+        self.pending_jump = False
+        self.pending_shoot = False
+        self.platform_index = SpatialHash(PLATFORM_CELL_SIZE)
+        self.enemy_index = SpatialHash(ENTITY_CELL_SIZE)
+        self.enemies = EntityPool(Enemy)
+        self.projectiles = EntityPool(Projectile)
+        self.setup_level()
+
+    def setup_level(self):
+        self.rng = random.Random(self.seed)
+        self.status = WORLD_PLAYING
+        self.score = 0
+        self.is_coin_collected = False
+        self.enemies_defeated = 0
+        self.player = Player(*self.level.player_start, self.events)
+        self.coin = Coin(*self.level.coin)
+        self.enemies.clear()
+        self.projectiles.clear()
+        self.enemy_batch = self.projectile_batch = None
+
+        self.platforms = []
+        self.platform_refs = {}
+        self.loaded_chunks = {}
+        self.active_chunks = {}
+        self.roaming_enemies = {}
+        self.defeated_spawns = set()
+        self.camera_x = self.camera_target()
+        self.streamed_camera_x = None
+        self.stream_chunks(load_budget=0)
+        if self.batch: self.start_batch()
+
+    def start_batch(self, enemies=None):
+        import batch
+        # Also called when streaming changes the active chunks; in-flight projectiles are kept.
+        self.enemy_batch = batch.EnemyBatch(self.enemies if enemies is None else enemies, self.rng)
+        self.platform_array = batch.platform_array(self.platforms)
+        if self.projectile_batch is None:
+            self.projectile_batch = batch.ProjectileBatch()
+            for projectile in self.projectiles: self.projectile_batch.add(projectile)
+            self.projectiles.clear()
+
+    def index_platforms(self):
+        self.platform_index.rebuild(self.platforms)
+
+    # --- Level Streaming ---
+    def camera_target(self):
+        x = self.player.rect.centerx - WIDTH // 2
+        return min(max(x, 0), max(self.level.width - WIDTH, 0))
+
+    def stream_chunks(self, load_budget=CHUNK_LOADS_PER_TICK):
+        if self.camera_x == self.streamed_camera_x: return
+        level, left, right = self.level, self.camera_x, self.camera_x + WIDTH
+        wanted = level.chunk_range(left - CHUNK_ACTIVE_MARGIN, right + CHUNK_ACTIVE_MARGIN)
+        kept = level.chunk_range(left - 2 * CHUNK_ACTIVE_MARGIN, right + 2 * CHUNK_ACTIVE_MARGIN)
+        prefetch = level.chunk_range(left - CHUNK_PREFETCH_MARGIN, right + CHUNK_PREFETCH_MARGIN)
+
+        stale = [index for index in self.active_chunks if index not in kept]
+        missing = [index for index in wanted if index not in self.active_chunks]
+        if stale or missing or self.roaming_enemies:
+            if self.enemy_batch is not None: self.enemy_batch.sync_views()
+            for index in stale: self.deactivate_chunk(index)
+            for index in missing: self.activate_chunk(index)
+            released = self.release_strays()
+            if stale or missing:
+                self.platforms = [entry[0] for entry in self.platform_refs.values()]
+                self.index_platforms()
+            if self.enemy_batch is not None and (stale or missing or released): self.start_batch()
+
+        for index in [i for i in self.loaded_chunks if i not in prefetch and i not in self.active_chunks]:
+            del self.loaded_chunks[index]
+        pending = [index for index in prefetch if index not in self.loaded_chunks]
+        for index in pending[:load_budget]: self.loaded_chunks[index] = level.read_chunk(index)
+        # Leave streamed_camera_x unset while reads are pending so the next tick continues them.
+        self.streamed_camera_x = self.camera_x if len(pending) <= load_budget else None
+
+    def activate_chunk(self, index):
+        chunk = self.loaded_chunks.get(index)
+        if chunk is None: chunk = self.loaded_chunks[index] = self.level.read_chunk(index)
+        for spec in chunk.platforms:
+            entry = self.platform_refs.get(spec)
+            if entry: entry[1] += 1
+            else: self.platform_refs[spec] = [Platform(*spec), 1]
+        handles = []
+        for spec in chunk.enemies:
+            if spec.id in self.defeated_spawns: continue
+            handle = self.roaming_enemies.pop(spec.id, None)
+            if handle and self.enemies.get(handle):
+                handles.append(handle)
+                continue
+            enemy = self.enemies.acquire(spec.x, spec.y, spec.patrol_start_x, spec.patrol_end_x, self.rng, spec.id)
+            handles.append(self.enemies.handle(enemy))
+        self.active_chunks[index] = (chunk, handles)
+
+    def deactivate_chunk(self, index):
+        chunk, handles = self.active_chunks.pop(index)
+        for spec in chunk.platforms:
+            entry = self.platform_refs[spec]
+            entry[1] -= 1
+            if not entry[1]: del self.platform_refs[spec]
+        # Enemies are only released by release_strays(), once they are away from the active chunks.
+        for handle in handles:
+            enemy = self.enemies.get(handle)
+            if enemy: self.roaming_enemies[enemy.spawn_id] = handle
+
+    def release_strays(self):
+        # An enemy outlives its spawn chunk while it stands in an active chunk,
+        # e.g. when it chased the player there.
+        released = False
+        chunk_width = self.level.chunk_width
+        for spawn_id, handle in list(self.roaming_enemies.items()):
+            enemy = self.enemies.get(handle)
+            if enemy and enemy.rect.centerx // chunk_width in self.active_chunks: continue
+            del self.roaming_enemies[spawn_id]
+            if enemy:
+                self.enemies.release(enemy)
+                released = True
+        return released
+
+    def defeat(self, enemy):
+        self.score += 1
+        self.enemies_defeated += 1
+        self.defeated_spawns.add(enemy.spawn_id)
+        self.events.append('enemy_defeated')
+
+    def step(self, inputs, dt):
+        self.pending_jump = self.pending_jump or inputs.jump
+        self.pending_shoot = self.pending_shoot or inputs.shoot
+        self.accumulator += dt
+        ticks = 0
+        while self.accumulator >= FIXED_DT and self.status == WORLD_PLAYING:
+            if ticks == MAX_TICKS_PER_STEP:
+                self.accumulator = 0.0
+                break
+            self.tick(inputs._replace(jump=self.pending_jump, shoot=self.pending_shoot))
+            self.pending_jump = self.pending_shoot = False
+            self.accumulator -= FIXED_DT
+            ticks += 1
+        return ticks
+
+    def tick(self, inputs, dt=FIXED_DT):
+        if self.status != WORLD_PLAYING: return
+        if self.recorder: self.recorder.record(inputs)
+        self.tick_count += 1
+        player = self.player
+        player.is_running = inputs.run
+        if inputs.jump: player.jump()
+        if inputs.shoot:
+            projectile = player.shoot(self.projectiles)
+            if projectile and self.projectile_batch is not None:
+                self.projectile_batch.add(projectile)
+                self.projectiles.release(projectile)
+        player.update(dt, self.platform_index, inputs)
+        self.camera_x = self.camera_target()
+        self.stream_chunks()
+
+        if not self.is_coin_collected:
+            self.coin.animate(dt)
+            if player.rect.colliderect(self.coin.rect):
+                self.is_coin_collected = True
+                self.score += 3
+                self.events.append('coin')
+
+        if self.enemy_batch is not None: self.update_batch(dt)
+        else:
+            self.update_projectiles()
+            self.update_enemies(dt)
+
+        if self.enemies_defeated >= self.level.goal and self.is_coin_collected:
+            self.status = WORLD_VICTORY
+        elif player.health <= 0 or player.rect.y > self.level.height + 50:
+            self.status = WORLD_GAME_OVER
+
+        # With a bus attached, each tick's events go out as one batch; otherwise
+        # they pile up until drain_events().
+        if self.bus is not None and self.events: self.bus.publish(self.drain_events())
+
+    def update_projectiles(self):
+        if not self.projectiles: return
+        self.enemy_index.rebuild(self.enemies)
+        spent = []
+        defeated = []
+        for p in self.projectiles:
+            p.update()
+            if not (self.camera_x < p.rect.x < self.camera_x + WIDTH): p.alive = False
+            for enemy in self.enemy_index.query(p.rect):
+                if p.rect.colliderect(enemy.rect):
+                    enemy.on_hit()
+                    p.alive = False
+                    if enemy.health <= 0 and enemy.alive:
+                        enemy.alive = False
+                        self.defeat(enemy)
+                        defeated.append(enemy)
+            if not p.alive: spent.append(p)
+
+        for p in spent: self.projectiles.release(p)
+        for enemy in defeated: self.enemies.release(enemy)
+
+    def update_batch(self, dt):
+        hits = self.projectile_batch.update(self.enemy_batch, self.camera_x)
+        defeated = self.enemy_batch.hit(hits)
+        if defeated.any():
+            for enemy in self.enemy_batch.remove(defeated):
+                self.defeat(enemy)
+                self.enemies.release(enemy)
+        self.enemy_batch.update(dt, self.player, self.platform_array)
+
+    def update_enemies(self, dt):
+        # Far enemies are due on different ticks (staggered by pool index), so
+        # the coarse updates are spread evenly instead of landing on one tick.
+        player, interval = self.player, AI_FAR_INTERVAL
+        near_left, near_right = player.rect.centerx - AI_NEAR_DISTANCE, player.rect.centerx + AI_NEAR_DISTANCE
+        for enemy in self.enemies:
+            if interval > 1 and not near_left <= enemy.rect.centerx <= near_right and enemy.is_calm():
+                if enemy.ai_skipped + 1 < interval and (self.tick_count + enemy.pool_index) % interval:
+                    enemy.ai_skipped += 1
+                    continue
+                enemy.fast_forward(enemy.ai_skipped + 1, dt, self.platform_index)
+            else:
+                # Catch up on skipped ticks before the first full update.
+                if enemy.ai_skipped: enemy.fast_forward(enemy.ai_skipped, dt, self.platform_index)
+                enemy.update(dt, player, self.platform_index)
+            enemy.ai_skipped = 0
+
+    def sync_views(self):
+        # Batch mode keeps enemy and projectile state in arrays; copy it back to
+        # the Enemy/Projectile objects only when something needs to draw them.
+        if self.enemy_batch is None: return
+        self.enemy_batch.sync_views()
+        self.projectile_batch.sync_views(self.projectiles)
+
+    def drain_events(self):
+        events = self.events[:]
+        self.events.clear()
+        return events
@@ -0,0 +1,66 @@
+# Indexes with few objects are answered with the plain list of all of them,
+# which is cheaper than hashing. Cells are only built once an index is queried
+# with more objects than this, from the rects as they are at that moment.
+SMALL_INDEX = 32
+
+# --- Spatial Hash ---
+class SpatialHash:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}
+        self.items = []
+        self.rects = []
+
+    def _cell_range(self, rect, margin=0):
+        size, half = self.cell_size, margin // 2
+        return (range((rect.left - half) // size, (rect.right + half - 1) // size + 1),
+                range((rect.top - half) // size, (rect.bottom + half - 1) // size + 1))
+
+    def insert(self, obj, rect=None):
+        self.items.append(obj)
+        self.rects.append(obj.rect if rect is None else rect)
+        if self.order: self._add_to_cells(len(self.items) - 1)
+
+    def _add_to_cells(self, i):
+        obj = self.items[i]
+        self.order[id(obj)] = i
+        columns, rows = self._cell_range(self.rects[i])
+        for cx in columns:
+            for cy in rows:
+                cell = self.cells.get((cx, cy))
+                if cell is None: self.cells[(cx, cy)] = [obj]
+                else: cell.append(obj)
+
+    def clear(self):
+        self.cells.clear()
+        self.order.clear()
+        self.items.clear()
+        self.rects.clear()
+
+    def rebuild(self, objs):
+        self.clear()
+        for obj in objs:
+            self.items.append(obj)
+            self.rects.append(obj.rect)
+
+    def query(self, rect, margin=0):
+        # Candidates come back in insertion order so callers resolve collisions
+        # in the same order as a plain list scan would. margin grows the query
+        # like rect.inflate(margin, margin) without building a new Rect. The
+        # returned list belongs to the index and must not be changed.
+        if len(self.items) <= SMALL_INDEX: return self.items
+        if not self.order:
+            for i in range(len(self.items)): self._add_to_cells(i)
+        columns, rows = self._cell_range(rect, margin)
+        cells = self.cells
+        if len(columns) == 1 and len(rows) == 1: return cells.get((columns[0], rows[0]), ())
+        found = {}
+        for cx in columns:
+            for cy in rows:
+                cell = cells.get((cx, cy))
+                if cell:
+                    for obj in cell: found[id(obj)] = obj
+        if len(found) <= 1: return list(found.values())
+        order = self.order
+        return sorted(found.values(), key=lambda obj: order[id(obj)])
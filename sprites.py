@@ -0,0 +1,44 @@
+from collections import OrderedDict
+import pygame
+from pgzero.loaders import images
+
+# --- Sprite Cache ---
+class SpriteCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, scale=1.0):
+        key = (name, scale)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._load(name, scale)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size: self.surfaces.popitem(last=False)
+        return surface
+
+    def preload(self, names, scale=1.0):
+        for name in names: self.get(name, scale)
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def _load(self, name, scale):
+        surface = images.load(name)
+        if scale != 1.0:
+            width, height = surface.get_size()
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            surface = pygame.transform.smoothscale(surface, size)
+        return surface
+
+    def blit_centered(self, screen, name, center, scale=1.0):
+        surface = self.get(name, scale)
+        rect = surface.get_rect(center=center)
+        screen.blit(surface, rect)
+        return rect
@@ -0,0 +1,111 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import simulation
+from simulation import FIXED_DT
+from headless import POLICIES, run_match
+from level import load_level
+
+# --- Parameter Grid ---
+# Constants simulation.py and batch.py read from the module on every tick.
+# Others such as FIXED_DT or WIDTH are copied at import time, so changing
+# them in a worker would do nothing.
+TUNABLE = ('GRAVITY', 'PLAYER_JUMP_VELOCITY', 'PLAYER_WALK_SPEED', 'PLAYER_RUN_SPEED', 'ENEMY_WALK_SPEED',
+           'ENEMY_RUN_SPEED', 'MAX_FALL_SPEED', 'ENEMY_SIGHT_RANGE', 'ENEMY_ATTACK_COOLDOWN',
+           'ENEMY_EDGE_DETECTION_OFFSET', 'PROJECTILE_SPEED', 'ATTACK_COOLDOWN', 'AI_NEAR_DISTANCE', 'AI_FAR_INTERVAL')
+
+def parse_param(text):
+    name, _, values = text.partition('=')
+    name = name.strip().upper()
+    if name not in TUNABLE:
+        raise argparse.ArgumentTypeError(f"'{name}' não pode ser variada; use uma de: {', '.join(TUNABLE)}")
+    parsed = []
+    for value in values.split(','):
+        number = float(value)
+        parsed.append(int(number) if number.is_integer() and isinstance(getattr(simulation, name), int) else number)
+    return name, parsed
+
+def build_grid(params):
+    names = [name for name, _ in params]
+    return [dict(zip(names, values)) for values in itertools.product(*(values for _, values in params))] or [{}]
+
+# --- Workers ---
+# Each task carries its whole parameter set, so a worker process can run
+# tasks from any grid point in any order. TUNABLE constants are read through
+# the module, so setting them on the module is enough.
+levels = {}
+
+def run_task(task):
+    point, params, policy_name, seed, max_seconds, batch, level_path = task
+    for name, value in params.items(): setattr(simulation, name, value)
+    if level_path and level_path not in levels: levels[level_path] = load_level(level_path)
+    policy = POLICIES[policy_name](random.Random(seed))
+    return point, run_match(policy, max_seconds, batch, seed, level=levels.get(level_path))
+
+# --- Aggregation ---
+def summarize(params, results):
+    victories = [r for r in results if r['result'] == 'victory']
+    count = len(results)
+    return {
+        **params,
+        'matches': count,
+        'win_rate': len(victories) / count,
+        'game_over_rate': sum(r['result'] == 'game_over' for r in results) / count,
+        'timeout_rate': sum(r['result'] == 'timeout' for r in results) / count,
+        'time_to_victory_s': sum(r['ticks'] for r in victories) * FIXED_DT / len(victories) if victories else None,
+        'damage_taken': sum(r['damage_taken'] for r in results) / count,
+        'enemies_defeated': sum(r['enemies_defeated'] for r in results) / count,
+        'score': sum(r['score'] for r in results) / count,
+    }
+
+def save_results(rows, path):
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w') as f: json.dump(rows, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Roda partidas sem janela em vários processos para cada combinação de constantes.")
+    parser.add_argument('--param', type=parse_param, action='append', default=[], metavar='NOME=V1,V2,...',
+                        help=f"constante de simulation.py e os valores a testar (pode repetir): {', '.join(TUNABLE)}")
+    parser.add_argument('--matches', type=int, default=100, help="partidas por combinação")
+    parser.add_argument('--max-seconds', type=float, default=120.0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='scripted')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', action='store_true', help="usa o modo em lote com numpy")
+    parser.add_argument('--level', metavar='ARQUIVO', help="joga esta fase em vez da fase padrão")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processos (padrão: todos os núcleos)")
+    parser.add_argument('--out', metavar='ARQUIVO', default='sweep.json', help="arquivo de resultados (.json ou .csv)")
+    args = parser.parse_args()
+
+    grid = build_grid(args.param)
+    # The same seeds are used at every grid point, so points are compared on identical matches.
+    tasks = [(point, params, args.policy, args.seed + i, args.max_seconds, args.batch, args.level)
+             for point, params in enumerate(grid) for i in range(args.matches)]
+    results = [[] for _ in grid]
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        chunksize = max(1, len(tasks) // (args.workers * 16))
+        for point, result in pool.imap_unordered(run_task, tasks, chunksize): results[point].append(result)
+    elapsed = time.perf_counter() - start
+
+    rows = [summarize(params, point_results) for params, point_results in zip(grid, results)]
+    save_results(rows, args.out)
+    print(f"{len(tasks)} partidas em {elapsed:.1f}s com {args.workers} processos ({len(tasks) / elapsed * 60:.0f} partidas/min)")
+    for row in sorted(rows, key=lambda r: -r['win_rate']):
+        params = ' '.join(f"{name}={row[name]}" for name in grid[0]) or 'padrão'
+        victory = f"{row['time_to_victory_s']:.1f}s" if row['time_to_victory_s'] is not None else '-'
+        print(f"  {params}: vitória {row['win_rate']:.0%}, tempo até vencer {victory}, dano {row['damage_taken']:.2f}")
+    print(f"Resultados salvos em {args.out}")
+
+if __name__ == '__main__':
+    main()